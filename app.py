@@ -1,11 +1,83 @@
-from flask import Flask, render_template, request
-from utils.comparison import (compare_players, get_player_id, get_player_headshot, get_team_logo,
-                              get_player_pos, get_nfl_games_for_player, calculate_average_fantasy_points,
-                              get_last_week_performance)
-from utils.api_calls import get_fantasy_point_projections
+import hashlib
+import math
+import os
+
+from flask import Flask, Response, jsonify, render_template, request
+from utils.cache_warmer import start_cache_warmer
+from utils.comparison import (ComparisonContext, compare_players, comparison_data_version, format_comparison,
+                              get_player_id)
+from utils.game_logs import game_log_version
+from utils.head_to_head import HEAD_TO_HEAD_LIMIT, head_to_head
+from utils.player_index import get_player_index
+from utils.roster import SLOT_POSITIONS, rank_roster
+from utils.scoring_profiles import STANDARD, make_scoring_profile, profile_key, profile_name
+from utils.simulation import simulate_comparison, simulate_roster
 
 app = Flask(__name__)
 
+# Seconds browsers and the CDN may reuse a JSON comparison before revalidating it
+COMPARE_MAX_AGE = int(os.getenv("COMPARE_MAX_AGE", "300"))
+# Most players one /api/roster request may rank
+ROSTER_MAX_PLAYERS = int(os.getenv("ROSTER_MAX_PLAYERS", "40"))
+
+
+@app.before_request
+def start_background_jobs():
+    # The server starts the warmer before serving (__main__ below, gunicorn.conf.py), this only
+    # covers servers without a startup hook. Importing the app never starts it.
+    start_cache_warmer()
+
+
+def parse_week(value):
+    """
+    Validates a requested week. The model averages over the weeks before it, so week 1 has nothing to compare.
+
+    :return: Tuple of (week, None), or (None, error message).
+    """
+    try:
+        week = int(value)
+    except (TypeError, ValueError):
+        return None, "Error: Week must be a number."
+    if not 2 <= week <= 18:
+        return None, "Error: Week must be between 2 and 18."
+    return week, None
+
+
+def parse_scoring(value, overrides=None):
+    """
+    Validates a requested scoring format: a profile name, optionally with points per unit changed.
+
+    :param value: A profile name from utils.scoring_profiles ('ppr', 'PPR', 'half-ppr', ...), or None
+                  for the model's default scoring.
+    :param overrides: Dict mapping scoring keys (e.g. 'pass_td') to points per unit. They make a custom
+                      profile based on the named one, PPR when none is named (optional).
+    :return: Tuple of (profile name, dict or None, None), or (None, error message).
+    """
+    if value is not None and not isinstance(value, str):
+        return None, "Error: Unknown scoring format."
+    try:
+        name = profile_name(value) if value else None
+        if not overrides:
+            return name, None
+        values = {}
+        for key, points in overrides.items():
+            try:
+                values[key] = float(points)
+            except (TypeError, ValueError):
+                values[key] = math.nan
+            if isinstance(points, bool) or not math.isfinite(values[key]):
+                return None, f"Error: Scoring value '{key}' must be a number."
+        return make_scoring_profile(name or 'ppr', **values), None
+    except ValueError as err:
+        return None, f"Error: {err}."
+
+
+def scoring_overrides(values):
+    """
+    Returns the scoring keys (e.g. 'pass_td') set among request arguments or form fields.
+    """
+    return {key: values[key] for key in STANDARD if key in values}
+
 
 @app.route('/')
 def index():
@@ -16,59 +88,291 @@ def index():
 def compare():
     player_a_name = request.form.get('player_a')
     player_b_name = request.form.get('player_b')
-    week = int(request.form.get('week'))
+    week, error = parse_week(request.form.get('week'))
+    if error:
+        return render_template('index.html', result=error)
+    scoring_profile, error = parse_scoring(request.form.get('scoring') or None, scoring_overrides(request.form))
+    if error:
+        return render_template('index.html', result=error)
 
-    # Get player IDs based on their names
-    player_a_id = get_player_id(player_a_name)
-    player_b_id = get_player_id(player_b_name)
+    # Use the IDs picked from autocomplete when present, otherwise resolve the typed names
+    player_a_id = request.form.get('player_a_id') or get_player_id(player_a_name)
+    player_b_id = request.form.get('player_b_id') or get_player_id(player_b_name)
 
     if not player_a_id or not player_b_id:
         result = "Error: Could not find one or both players."
         return render_template('index.html', result=result)
 
-    # Fetch headshots for both players
-    player_a_headshot, team1 = get_player_headshot(player_a_name)
-    player_b_headshot, team2 = get_player_headshot(player_b_name)
-
-    player_a_team_logo = get_team_logo(team1)
-    player_b_team_logo = get_team_logo(team2)
+    # Load both players' data once, the comparison and the page both read from it
+    context = ComparisonContext.load(player_a_id, player_b_id, week, player_a_name, player_b_name,
+                                     scoring_profile=scoring_profile)
+    if context.error:
+        return render_template('index.html', result=context.error)
 
-    player_a_projections = get_fantasy_point_projections(player_id=player_a_id)
-    player_b_projections = get_fantasy_point_projections(player_id=player_b_id)
+    comparison = compare_players(player_a_id, player_b_id, week, player_a_name, player_b_name, context=context)
+    result = format_comparison(comparison)
+    simulation = None
+    if request.form.get('simulate') and 'error' not in comparison:
+        simulation = simulate_comparison(
+            comparison, seed=_simulation_seed(comparison['player_a'], comparison['player_b']))
 
-    player_a_pos = get_player_pos(player_a_projections)
-    player_b_pos = get_player_pos(player_b_projections)
-
-    player_a_recent_games = get_nfl_games_for_player(player_a_id, number_of_games=week - 1)
-    player_b_recent_games = get_nfl_games_for_player(player_b_id, number_of_games=week - 1)
-
-    player_a_average_points = round(float(calculate_average_fantasy_points(player_a_recent_games) / (week - 1)), 2)
-    player_b_average_points = round(float(calculate_average_fantasy_points(player_b_recent_games) / (week - 1)), 2)
-
-    player_a_last_week_performance = get_last_week_performance(player_a_recent_games)
-    player_b_last_week_performance = get_last_week_performance(player_b_recent_games)
-
-    # Perform the comparison
-    result = compare_players(player_a_id, player_b_id, week, player_a_name, player_b_name)
+    player_a = context.player_a
+    player_b = context.player_b
 
     # Pass the result and headshots back to the template for rendering
     return render_template(
         'index.html',
         result=result,
+        comparison=comparison,
+        simulation=simulation,
         player_a_name=player_a_name,
         player_b_name=player_b_name,
-        player_a_headshot=player_a_headshot,
-        player_b_headshot=player_b_headshot,
-        player_a_team_logo=player_a_team_logo,
-        player_b_team_logo=player_b_team_logo,
-        player_a_pos=player_a_pos,
-        player_b_pos=player_b_pos,
-        player_a_average_points=player_a_average_points,
-        player_b_average_points=player_b_average_points,
-        player_a_lastweek_performance=player_a_last_week_performance,
-        player_b_lastweek_performance=player_b_last_week_performance
+        player_a_headshot=player_a.headshot,
+        player_b_headshot=player_b.headshot,
+        player_a_team_logo=player_a.team_logo,
+        player_b_team_logo=player_b.team_logo,
+        player_a_pos=player_a.position,
+        player_b_pos=player_b.position,
+        player_a_average_points=round(float(player_a.average_points), 2),
+        player_b_average_points=round(float(player_b.average_points), 2),
+        player_a_lastweek_performance=player_a.last_week_points,
+        player_b_lastweek_performance=player_b.last_week_points
     )
 
 
+@app.route('/api/players')
+def search_players():
+    query = request.args.get('q', '')
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return _api_error("Error: Limit must be a number.", 400)
+    limit = max(1, min(limit, 50))
+
+    index = get_player_index()
+    if index is None:
+        return _api_error("Error: Could not load players.", 503)
+
+    return jsonify({'players': index.search(query, limit=limit)})
+
+
+def _comparison_etag(version, player_a_id, player_b_id, week, scoring_profile, player_a_name, player_b_name,
+                     simulate=False):
+    # The names are part of the body, so they are part of its identity
+    scoring = profile_key(scoring_profile) or ''
+    identity = f"{version}|{player_a_id}|{player_b_id}|{week}|{scoring}|{player_a_name}|{player_b_name}"
+    if simulate:
+        identity += "|simulate"
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+def _player_name(player_id):
+    index = get_player_index()
+    player = index.get(str(player_id)) if index is not None and player_id else None
+    return player['name'] if player else None
+
+
+def _simulation_seed(*scores):
+    # Seeded from what is simulated, so the same comparison always gets the same draws and its ETag holds
+    identity = '|'.join(f"{score['id']}:{score['score']}:{score['spread']}" for score in scores)
+    return int(hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16], 16)
+
+
+def _api_error(message, status):
+    response = jsonify({'error': message})
+    response.status_code = status
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def _cache_headers(response, etag, last_modified):
+    response.set_etag(etag)
+    response.last_modified = int(last_modified)
+    response.headers['Cache-Control'] = f'public, max-age={COMPARE_MAX_AGE}'
+    return response
+
+
+@app.route('/api/compare')
+def api_compare():
+    player_a_name = request.args.get('player_a')
+    player_b_name = request.args.get('player_b')
+    week, error = parse_week(request.args.get('week'))
+    if error:
+        return _api_error(error, 400)
+    scoring_profile, error = parse_scoring(request.args.get('scoring') or None, scoring_overrides(request.args))
+    if error:
+        return _api_error(error, 400)
+    simulate = request.args.get('simulate', '').lower() in ('1', 'true', 'yes')
+
+    player_a_id = request.args.get('player_a_id') or get_player_id(player_a_name)
+    player_b_id = request.args.get('player_b_id') or get_player_id(player_b_name)
+    # Names are optional next to IDs, the result then names the players as the index does
+    player_a_name = player_a_name or _player_name(player_a_id)
+    player_b_name = player_b_name or _player_name(player_b_id)
+    if not player_a_id or not player_b_id or not player_a_name or not player_b_name:
+        return _api_error("Error: Could not find one or both players.", 404)
+
+    # Answer conditional requests from the data version alone, before computing anything
+    version = comparison_data_version(player_a_id, player_b_id, week)
+    if version is not None:
+        etag = _comparison_etag(version[0], player_a_id, player_b_id, week, scoring_profile,
+                                player_a_name, player_b_name, simulate)
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(etag)
+        else:
+            not_modified = (request.if_modified_since is not None and
+                            int(version[1]) <= request.if_modified_since.timestamp())
+        if not_modified:
+            response = app.response_class(status=304)
+            return _cache_headers(response, etag, version[1])
+
+    comparison = compare_players(player_a_id, player_b_id, week, player_a_name, player_b_name,
+                                 scoring_profile=scoring_profile)
+    if 'error' in comparison:
+        return _api_error(comparison['error'], 502)
+
+    body = {'result': format_comparison(comparison), 'comparison': comparison}
+    if simulate:
+        body['simulation'] = simulate_comparison(
+            comparison, seed=_simulation_seed(comparison['player_a'], comparison['player_b']))
+    response = jsonify(body)
+    version = comparison_data_version(player_a_id, player_b_id, week)
+    if version is None:
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    etag = _comparison_etag(version[0], player_a_id, player_b_id, week, scoring_profile,
+                            player_a_name, player_b_name, simulate)
+    return _cache_headers(response, etag, version[1])
+
+
+@app.route('/api/roster', methods=['POST'])
+def api_roster():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return _api_error("Error: Send the roster as a JSON object.", 400)
+    week, error = parse_week(payload.get('week'))
+    if error:
+        return _api_error(error, 400)
+    # A profile name, or an object of points per unit with an optional 'base' profile name
+    scoring = payload.get('scoring') or None
+    if isinstance(scoring, dict):
+        overrides = {key: value for key, value in scoring.items() if key != 'base'}
+        scoring_profile, error = parse_scoring(scoring.get('base'), overrides or None)
+    else:
+        scoring_profile, error = parse_scoring(scoring)
+    if error:
+        return _api_error(error, 400)
+
+    entries = payload.get('players') or []
+    if not isinstance(entries, list):
+        return _api_error("Error: 'players' must be a list.", 400)
+
+    slots = payload.get('slots') or None
+    seats = 0
+    candidates = []
+    if slots is not None:
+        if not isinstance(slots, dict):
+            return _api_error("Error: 'slots' must map slot names to counts or candidate lists.", 400)
+        for slot, spec in slots.items():
+            if isinstance(spec, list):
+                if not spec:
+                    return _api_error(f"Error: Slot '{slot}' has an empty candidate list.", 400)
+                candidates.extend(spec)
+                seats += 1
+            elif slot not in SLOT_POSITIONS:
+                return _api_error(f"Error: Unknown lineup slot '{slot}'.", 400)
+            elif not isinstance(spec, int) or isinstance(spec, bool) or spec < 1:
+                return _api_error(f"Error: Slot '{slot}' needs a positive number of starters.", 400)
+            else:
+                seats += spec
+
+    # Candidate lists are part of the roster, so they alone can make one
+    roster_size = len({str(entry) for entry in entries + candidates})
+    if not roster_size:
+        return _api_error("Error: Send the roster as a non-empty 'players' list or candidate lists in 'slots'.", 400)
+    if roster_size > ROSTER_MAX_PLAYERS:
+        return _api_error(f"Error: A roster may have at most {ROSTER_MAX_PLAYERS} players.", 400)
+    # Every seat is a row of the lineup assignment, a roster cannot start more players than it has
+    if seats > roster_size:
+        return _api_error(f"Error: The lineup has {seats} starters but the roster only {roster_size} players.", 400)
+
+    index = get_player_index()
+    if index is None:
+        return _api_error("Error: Could not load players.", 503)
+
+    # Entries may be player IDs or names
+    players = {}
+    unresolved = {}
+
+    def resolve(entry):
+        player = index.get(str(entry)) or index.lookup(str(entry))
+        if player:
+            players[player['id']] = player['name']
+            return player['id']
+        unresolved[str(entry)] = "Error: Could not find player."
+        return None
+
+    for entry in entries:
+        resolve(entry)
+    if slots is not None:
+        # Candidate lists may name players too, resolve them to IDs and score them with the roster
+        for slot, spec in slots.items():
+            if isinstance(spec, list):
+                slots[slot] = [player_id for player_id in map(resolve, spec) if player_id is not None]
+
+    ranking = rank_roster(players, week, slots=slots, scoring_profile=scoring_profile)
+    if 'error' in ranking:
+        return _api_error(ranking['error'], 502)
+    ranking['errors'].update(unresolved)
+    if payload.get('simulate'):
+        ranking['simulation'] = simulate_roster(ranking['players'], seed=_simulation_seed(*ranking['players']))
+    return jsonify(ranking)
+
+
+@app.route('/api/head-to-head')
+def api_head_to_head():
+    position = request.args.get('position', '').upper()
+    if position not in ('QB', 'RB', 'WR', 'TE'):
+        return _api_error("Error: Position must be one of QB, RB, WR or TE.", 400)
+    week, error = parse_week(request.args.get('week'))
+    if error:
+        return _api_error(error, 400)
+    try:
+        limit = min(int(request.args.get('limit', HEAD_TO_HEAD_LIMIT)), 200)
+    except ValueError:
+        return _api_error("Error: Limit must be a number.", 400)
+    if limit < 2:
+        return _api_error("Error: Limit must be at least 2.", 400)
+    scoring_profile, error = parse_scoring(request.args.get('scoring') or None, scoring_overrides(request.args))
+    if error:
+        return _api_error(error, 400)
+    output = request.args.get('format', 'json')
+    if output not in ('json', 'csv'):
+        return _api_error("Error: Format must be json or csv.", 400)
+
+    # Matrices are built from the ingested box scores only, fetching 100+ game logs live would
+    # take the shared rate limit from every /compare request
+    if game_log_version() is None:
+        return _api_error("Error: Head-to-head needs ingested game logs, none are available.", 503)
+    matrix = head_to_head(position, week, limit=limit, scoring_profile=scoring_profile)
+    if matrix is None:
+        return _api_error("Error: Could not retrieve data for the position.", 502)
+    if not len(matrix):
+        return _api_error("Error: No ingested game logs for the position.", 503)
+
+    if output == 'csv':
+        response = Response(matrix.iter_csv(), mimetype='text/csv')
+        response.headers['Content-Disposition'] = f'attachment; filename=head_to_head_{position}_week{week}.csv'
+        # The CSV only has room for the matrix, the players left out of it are listed here
+        response.headers['X-Skipped-Players'] = ','.join(player['id'] for player in matrix.skipped)
+    else:
+        response = Response(matrix.iter_json(), mimetype='application/json')
+    response.headers['Cache-Control'] = f'public, max-age={COMPARE_MAX_AGE}'
+    return response
+
+
 if __name__ == '__main__':
+    # With the debug reloader the app is served by a child process, warm the cache there only
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_cache_warmer(prefetch=True)
     app.run(debug=True)
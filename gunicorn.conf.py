@@ -0,0 +1,9 @@
+def post_fork(server, worker):
+    # Each worker sends at most its share of the plan's rate limit
+    from utils.api_calls import client
+    client.share_rate_limit(server.cfg.workers)
+
+    # Fill the league-wide caches before the worker accepts requests, so no user request waits on
+    # those downloads. With API_CACHE_DB set only the lease holder downloads, the others read its copy.
+    from utils.cache_warmer import start_cache_warmer
+    start_cache_warmer(prefetch=True)
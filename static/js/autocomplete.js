@@ -0,0 +1,30 @@
+document.querySelectorAll('input[data-id-field]').forEach(function (input) {
+    const idField = document.getElementById(input.dataset.idField);
+    const options = document.getElementById(input.getAttribute('list'));
+    let players = [];
+
+    input.addEventListener('input', function () {
+        // Forget the previously picked ID until the text matches a suggestion again
+        const picked = players.find(player => player.name === input.value);
+        idField.value = picked ? picked.id : '';
+        if (picked || input.value.length < 2) {
+            return;
+        }
+
+        fetch(`/api/players?q=${encodeURIComponent(input.value)}`)
+        .then(response => response.json())
+        .then(data => {
+            players = data.players || [];
+            options.innerHTML = '';
+            players.forEach(player => {
+                const option = document.createElement('option');
+                option.value = player.name;
+                option.label = `${player.pos} - ${player.team}`;
+                options.appendChild(option);
+            });
+        })
+        .catch(() => {
+            players = [];
+        });
+    });
+});
@@ -5,13 +5,9 @@ document.getElementById('compare-form').addEventListener('submit', function (eve
     const playerB = document.getElementById('playerB').value;
     const week = document.getElementById('week').value;
 
-    fetch('/compare', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ playerA: playerA, playerB: playerB, week: week }),
-    })
+    // GET so the browser and CDN can cache the comparison and revalidate it with its ETag
+    const params = new URLSearchParams({ player_a: playerA, player_b: playerB, week: week });
+    fetch(`/api/compare?${params}`)
     .then(response => response.json())
     .then(data => {
         if (data.error) {
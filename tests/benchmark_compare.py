@@ -0,0 +1,106 @@
+import argparse
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+# The cache warmer would make real upstream calls alongside the replayed ones
+os.environ['CACHE_WARMER'] = '0'
+
+from app import app
+from utils.api_calls import client
+from utils.cache import response_cache
+from utils.comparison import compare_players, get_player_id
+from utils.http_client import POOL_SIZE
+from utils.records import record_cache
+from utils.replay import RecordingAdapter, ReplayAdapter
+
+# Same matchups as test_comparison.py
+PAIRS = [
+    ("Aaron Rodgers", "Patrick Mahomes"),
+    ("Ladd McConkey", "Xavier Worthy"),
+    ("Breece Hall", "Bucky Irving"),
+    ("Brock Bowers", "Travis Kelce"),
+]
+
+
+def percentiles(samples):
+    values = np.array(samples) * 1000
+    return {name: float(np.percentile(values, q)) for name, q in (('p50', 50), ('p95', 95), ('p99', 99))}
+
+
+def post_compare(test_client, player_a, player_b, week):
+    return test_client.post('/compare', data={'player_a': player_a, 'player_b': player_b, 'week': week})
+
+
+def record(fixtures, week):
+    """
+    Runs every pair once against the real API, saving each response as a fixture.
+    """
+    client.session.mount('https://', RecordingAdapter(fixtures, pool_connections=1, pool_maxsize=POOL_SIZE))
+    test_client = app.test_client()
+    for player_a, player_b in PAIRS:
+        post_compare(test_client, player_a, player_b, week)
+        print(f"Recorded {player_a} vs {player_b}")
+
+
+def benchmark(name, run, adapter, iterations, cold):
+    """
+    Times run() for every pair and counts the upstream calls it made.
+
+    :param run: Callable taking (player_a, player_b) that performs one comparison.
+    :param cold: Clear the response cache before every comparison.
+    """
+    timings = []
+    calls = []
+    for _ in range(iterations):
+        for player_a, player_b in PAIRS:
+            if cold:
+                response_cache.clear()
+                record_cache.clear()
+            adapter.reset_counts()
+            start = time.perf_counter()
+            run(player_a, player_b)
+            timings.append(time.perf_counter() - start)
+            calls.append(sum(adapter.calls.values()))
+
+    # Peak memory is measured in a separate pass, tracemalloc slows everything down
+    response_cache.clear()
+    record_cache.clear()
+    tracemalloc.start()
+    for player_a, player_b in PAIRS:
+        run(player_a, player_b)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = percentiles(timings)
+    print(f"{name}: p50 {stats['p50']:.1f} ms, p95 {stats['p95']:.1f} ms, p99 {stats['p99']:.1f} ms, "
+          f"{np.mean(calls):.1f} upstream calls per comparison, peak memory {peak / 1024:.0f} KiB")
+    if adapter.misses:
+        print(f"  missing fixtures: {dict(adapter.misses)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark /compare and compare_players against recorded fixtures.")
+    parser.add_argument('--fixtures', required=True, help="Fixture directory to record into or replay from.")
+    parser.add_argument('--record', action='store_true', help="Record fixtures from the real API instead.")
+    parser.add_argument('--latency', type=float, default=0.05, help="Injected upstream latency in seconds.")
+    parser.add_argument('--iterations', type=int, default=10, help="Rounds over all pairs.")
+    parser.add_argument('--week', type=int, default=4, help="Week to compare.")
+    parser.add_argument('--warm', action='store_true', help="Keep the response cache between comparisons.")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.fixtures, args.week)
+    else:
+        replay = ReplayAdapter(args.fixtures, args.latency)
+        client.session.mount('https://', replay)
+        test_client = app.test_client()
+
+        benchmark('/compare', lambda a, b: post_compare(test_client, a, b, args.week),
+                  replay, args.iterations, not args.warm)
+
+        player_ids = {name: get_player_id(name) for pair in PAIRS for name in pair}
+        benchmark('compare_players', lambda a, b: compare_players(player_ids[a], player_ids[b], args.week, a, b),
+                  replay, args.iterations, not args.warm)
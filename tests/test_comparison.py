@@ -1,4 +1,4 @@
-from utils.comparison import compare_players, get_player_id
+from utils.comparison import compare_players, format_comparison, get_player_id
 
 
 if __name__ == "__main__":
@@ -11,7 +11,7 @@ if __name__ == "__main__":
         print(f"Found Patrick Mahomes' ID: {patrick_mahomes_id}")
 
         # Compare Aaron Rodgers and Patrick Mahomes
-        print(compare_players(aaron_rodgers_id, patrick_mahomes_id, 4, "Aaron Rodgers", "Patrick Mahomes"))
+        print(format_comparison(compare_players(aaron_rodgers_id, patrick_mahomes_id, 4, "Aaron Rodgers", "Patrick Mahomes")))
     else:
         print("Failed to retrieve player IDs for Aaron Rodgers or Patrick Mahomes.")
 
@@ -22,7 +22,7 @@ if __name__ == "__main__":
         print(f"Found Ladd McConkey's ID: {ladd_mcconkey_id}")
         print(f"Found Xavier Worthy's ID: {xavier_worthy_id}")
 
-        print(compare_players(ladd_mcconkey_id, xavier_worthy_id, 4, "Ladd McConkey", "Xavier Worthy"))
+        print(format_comparison(compare_players(ladd_mcconkey_id, xavier_worthy_id, 4, "Ladd McConkey", "Xavier Worthy")))
     else:
         print("Failed to retrieve player IDs for Ladd McConkey and Xavier Worthy")
 
@@ -33,7 +33,7 @@ if __name__ == "__main__":
     if breece_hall_id and bucky_irving_id:
         print(f"Found Breece Hall's ID: {breece_hall_id}")
         print(f"Found Bucky Irving's ID: {bijan_robinson_id}")
-        print(compare_players(breece_hall_id, bucky_irving_id, 4, "Breece Hall", "Bucky Irving"))
+        print(format_comparison(compare_players(breece_hall_id, bucky_irving_id, 4, "Breece Hall", "Bucky Irving")))
     else:
         print("Failed to retrieve player IDs for Breece Hall and Bijan Robinson")
 
@@ -44,6 +44,6 @@ if __name__ == "__main__":
         print(f"Found Brock Bowers' ID: {brock_bowers_id}")
         print(f"Found Travis Kelce's ID: {travis_kelce_id}")
 
-        print(compare_players(brock_bowers_id, travis_kelce_id, 4, "Brock Bowers", "Travis Kelce"))
+        print(format_comparison(compare_players(brock_bowers_id, travis_kelce_id, 4, "Brock Bowers", "Travis Kelce")))
     else:
         print("Failed to retrieve player IDs for Brock Bowers and Travis Kelce")
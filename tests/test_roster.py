@@ -0,0 +1,29 @@
+from utils.roster import optimal_lineup
+
+
+def player(player_id, position, score):
+    return {'id': player_id, 'position': position, 'score': score}
+
+
+if __name__ == "__main__":
+    # Two candidate lists sharing their best player: A must start where only it beats the alternative
+    scores = [player('A', 'WR', 20.0), player('B', 'WR', 15.0), player('C', 'WR', 5.0)]
+    lineup, bench = optimal_lineup(scores, {'SLOT1': ['A', 'B'], 'SLOT2': ['A', 'C']})
+    print(f"Candidate lists: {lineup}, bench {bench}")
+    assert lineup == {'SLOT1': ['B'], 'SLOT2': ['A']}, lineup
+    assert bench == ['C'], bench
+
+    # The flex spot takes the best player the dedicated slots left over
+    scores = [player('qb', 'QB', 18.0), player('rb1', 'RB', 14.0), player('rb2', 'RB', 12.0),
+              player('rb3', 'RB', 11.0), player('wr1', 'WR', 13.0), player('wr2', 'WR', 9.0),
+              player('wr3', 'WR', 10.5), player('te', 'TE', 7.0)]
+    lineup, bench = optimal_lineup(scores)
+    print(f"Default slots: {lineup}, bench {bench}")
+    assert lineup == {'QB': ['qb'], 'RB': ['rb1', 'rb2'], 'WR': ['wr1', 'wr3'], 'TE': ['te'], 'FLEX': ['rb3']}, lineup
+    assert bench == ['wr2'], bench
+
+    # Seats without an eligible player stay empty
+    lineup, bench = optimal_lineup([player('wr1', 'WR', 13.0)], {'QB': 1, 'WR': 2})
+    print(f"Short roster: {lineup}, bench {bench}")
+    assert lineup == {'QB': [], 'WR': ['wr1']}, lineup
+    assert bench == [], bench
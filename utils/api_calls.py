@@ -1,6 +1,10 @@
 import os
 import requests
 from dotenv import load_dotenv
+from utils.cache import cached_endpoint
+from utils.http_client import Tank01Client
+from utils.replay import install_transport
+from utils.snapshot_store import served_offline
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,8 +19,16 @@ BASE_TEAM_URL = f"https://{RAPIDAPI_HOST}/getNFLTeams"
 BASE_PLAYER_STATS_URL = f"https://{RAPIDAPI_HOST}/getNFLGamesForPlayer"
 BASE_WEEKLY_GAMES_URL = f"https://{RAPIDAPI_HOST}/getNFLGamesForWeek"
 BASE_PLAYER_INFO_URL = f"https://{RAPIDAPI_HOST}/getNFLPlayerInfo"
+BASE_BOX_SCORE_URL = f"https://{RAPIDAPI_HOST}/getNFLBoxScore"
 
+# Shared pooled client, so every fetcher reuses kept-alive connections and the same headers
+client = Tank01Client(RAPIDAPI_HOST, RAPIDAPI_KEY)
+# Record real responses as fixtures or replay them, see utils/replay.py
+transport = install_transport(client)
 
+
+@cached_endpoint('getNFLProjections')
+@served_offline('getNFLProjections')
 def get_fantasy_point_projections(week='season', archive_season=2024, player_id=None, team_id=None, **scoring_params):
     """
     Fetches fantasy point projections for NFL players.
@@ -41,13 +53,8 @@ def get_fantasy_point_projections(week='season', archive_season=2024, player_id=
     elif team_id:
         params['teamID'] = team_id
 
-    headers = {
-        'x-rapidapi-host': RAPIDAPI_HOST,
-        'x-rapidapi-key': RAPIDAPI_KEY,
-    }
-
     try:
-        response = requests.get(BASE_URL, headers=headers, params=params)
+        response = client.get(BASE_URL, params=params)
         response.raise_for_status()  # Raise an exception for 4XX/5XX errors
         data = response.json()
         return data  # You can further process this data if needed
@@ -60,6 +67,8 @@ def get_fantasy_point_projections(week='season', archive_season=2024, player_id=
     return None
 
 
+@cached_endpoint('getNFLTeams')
+@served_offline('getNFLTeams')
 def get_nfl_teams(sort_by="standings", rosters=False, schedules=False, top_performers=True,
                   team_stats=True, team_stats_season=2023):
     """
@@ -84,13 +93,8 @@ def get_nfl_teams(sort_by="standings", rosters=False, schedules=False, top_perfo
         'teamStatsSeason': team_stats_season,
     }
 
-    headers = {
-        'x-rapidapi-host': RAPIDAPI_HOST,
-        'x-rapidapi-key': RAPIDAPI_KEY,
-    }
-
     try:
-        response = requests.get(BASE_TEAM_URL, headers=headers, params=params)
+        response = client.get(BASE_TEAM_URL, params=params)
         response.raise_for_status()
         data = response.json()
         return data  # You can further process this data if needed
@@ -103,6 +107,8 @@ def get_nfl_teams(sort_by="standings", rosters=False, schedules=False, top_perfo
     return None
 
 
+@cached_endpoint('getNFLGamesForPlayer')
+@served_offline('getNFLGamesForPlayer')
 def get_nfl_games_for_player(player_id, fantasy_points=True, number_of_games=None, two_point_conversions=2,
                              pass_yards=0.04, pass_td=4, pass_interceptions=-2, points_per_reception=1,
                              carries=0.2, rush_yards=0.1, rush_td=6, fumbles=-2, receiving_yards=0.1,
@@ -164,13 +170,8 @@ def get_nfl_games_for_player(player_id, fantasy_points=True, number_of_games=Non
     if season:
         params['season'] = season
 
-    headers = {
-        'x-rapidapi-host': RAPIDAPI_HOST,
-        'x-rapidapi-key': RAPIDAPI_KEY,
-    }
-
     try:
-        response = requests.get(BASE_PLAYER_STATS_URL, headers=headers, params=params)
+        response = client.get(BASE_PLAYER_STATS_URL, params=params)
         response.raise_for_status()
         data = response.json()
         return data  # You can further process this data if needed
@@ -183,6 +184,8 @@ def get_nfl_games_for_player(player_id, fantasy_points=True, number_of_games=Non
     return None
 
 
+@cached_endpoint('getNFLGamesForWeek')
+@served_offline('getNFLGamesForWeek')
 def get_nfl_games_for_week(week, season_type="reg", season=None):
     """
     Fetches NFL games for a given week in a specific season.
@@ -202,14 +205,9 @@ def get_nfl_games_for_week(week, season_type="reg", season=None):
     if season:
         params['season'] = season
 
-    headers = {
-        'x-rapidapi-host': RAPIDAPI_HOST,
-        'x-rapidapi-key': RAPIDAPI_KEY,
-    }
-
     try:
         # Perform the GET request
-        response = requests.get(BASE_WEEKLY_GAMES_URL, headers=headers, params=params)
+        response = client.get(BASE_WEEKLY_GAMES_URL, params=params)
         response.raise_for_status()  # Raise an error for bad responses
         data = response.json()  # Parse the JSON response
         return data  # Return the game data
@@ -222,6 +220,8 @@ def get_nfl_games_for_week(week, season_type="reg", season=None):
     return None
 
 
+@cached_endpoint('getNFLPlayerInfo')
+@served_offline('getNFLPlayerInfo')
 def get_nfl_player_headshot(player_name, get_stats=True):
     """
     Fetches an NFL player's ESPN headshot based on their name.
@@ -236,14 +236,9 @@ def get_nfl_player_headshot(player_name, get_stats=True):
         'getStats': str(get_stats).lower(),  # Convert to string ('true'/'false')
     }
 
-    headers = {
-        'x-rapidapi-host': RAPIDAPI_HOST,
-        'x-rapidapi-key': RAPIDAPI_KEY,
-    }
-
     try:
         # Perform the GET request
-        response = requests.get(BASE_PLAYER_INFO_URL, headers=headers, params=params)
+        response = client.get(BASE_PLAYER_INFO_URL, params=params)
         response.raise_for_status()  # Raise an error for bad responses
 
         # Parse the JSON response
@@ -266,3 +261,57 @@ def get_nfl_player_headshot(player_name, get_stats=True):
         print(f"Other error occurred: {err}")
 
     return None
+
+
+@cached_endpoint('getNFLBoxScore')
+@served_offline('getNFLBoxScore')
+def get_nfl_box_score(game_id, fantasy_points=True, two_point_conversions=2, pass_yards=0.04, pass_td=4,
+                      pass_interceptions=-2, points_per_reception=1, carries=0.2, rush_yards=0.1, rush_td=6,
+                      fumbles=-2, receiving_yards=0.1, receiving_td=6, targets=0, def_td=6, xp_made=1,
+                      xp_missed=-1, fg_made=3, fg_missed=-3):
+    """
+    Fetches the box score of one NFL game, with every player's stat line.
+
+    The scoring parameters default to the same values as get_nfl_games_for_player, so the
+    players' 'fantasyPointsDefault' match their game logs.
+
+    :param game_id: The Tank01 game ID (e.g., '20240908_KC@BAL').
+    :param fantasy_points: Whether to calculate fantasy points (default: True).
+    :return: A JSON response with the game's details and 'playerStats' keyed by player ID.
+    """
+
+    # Set up the query parameters
+    params = {
+        'gameID': game_id,
+        'fantasyPoints': str(fantasy_points).lower(),
+        'twoPointConversions': two_point_conversions,
+        'passYards': pass_yards,
+        'passTD': pass_td,
+        'passInterceptions': pass_interceptions,
+        'pointsPerReception': points_per_reception,
+        'carries': carries,
+        'rushYards': rush_yards,
+        'rushTD': rush_td,
+        'fumbles': fumbles,
+        'receivingYards': receiving_yards,
+        'receivingTD': receiving_td,
+        'targets': targets,
+        'defTD': def_td,
+        'xpMade': xp_made,
+        'xpMissed': xp_missed,
+        'fgMade': fg_made,
+        'fgMissed': fg_missed,
+    }
+
+    try:
+        response = client.get(BASE_BOX_SCORE_URL, params=params)
+        response.raise_for_status()
+        data = response.json()
+        return data
+
+    except requests.exceptions.HTTPError as http_err:
+        print(f"HTTP error occurred: {http_err}")
+    except Exception as err:
+        print(f"Other error occurred: {err}")
+
+    return None
@@ -0,0 +1,300 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from utils.comparison import ComparisonContext, PlayerSnapshot, score_player
+from utils.matchups import MATCHUP_SEASON, REGULAR_SEASON_WEEKS, DefenseAllowedTable, WeeklyMatchups
+from utils.records import GameLog, GameRecord, PlayerRecord
+from utils.scoring_engine import ProjectionEngine
+from utils.scoring_profiles import SCORING_PROFILES, stat_value
+from utils.snapshot_store import DEFAULT_STORE_PATH, SnapshotStore
+from utils.teams import TeamRepository
+
+BACKTEST_POSITIONS = ('QB', 'RB', 'WR', 'TE')
+# Box score stat each defensive team stat sums, as (section, stat) of the opposing players' lines
+DEFENSE_STAT_LINES = {
+    'passingYardsAllowed': ('Passing', 'passYds'),
+    'passingTDAllowed': ('Passing', 'passTD'),
+    'defensiveInterceptions': ('Passing', 'int'),
+    'rushingYardsAllowed': ('Rushing', 'rushYds'),
+    'rushingTDAllowed': ('Rushing', 'rushTD'),
+}
+
+
+def replayable_weeks(store, season, weeks=None):
+    """
+    Returns the weeks whose earlier games all have a stored final score.
+
+    Only those weeks can be replayed with the team records and defensive totals of the games before
+    them. Stores ingested before final scores were saved need the weeks ingested again with --force.
+
+    :param store: The SnapshotStore to read.
+    :param season: Season year.
+    :param weeks: Weeks to consider (default: 2 through 18).
+    """
+    weeks = set(weeks or range(2, REGULAR_SEASON_WEEKS + 1))
+    finished = {result['gameID'] for result in store.game_results(season)}
+    replayable = []
+    for week in range(1, REGULAR_SEASON_WEEKS + 1):
+        if week in weeks:
+            replayable.append(week)
+        games = store.weekly_games(week, season)
+        if not games or any(game['gameID'] not in finished for game in games['body']):
+            break
+    return replayable
+
+
+def team_records(teams, results):
+    """
+    Rebuilds every team's record and current streak from completed games.
+
+    :param teams: The 'body' list from a getNFLTeams response.
+    :param results: Final scores in week order, see SnapshotStore.game_results.
+    :return: Copy of teams with 'wins', 'loss', 'tie' and 'currentStreak' as they stood after those games.
+    """
+    records = {team['teamAbv']: {'W': 0, 'L': 0, 'T': 0, 'streak': None, 'length': 0} for team in teams}
+    for result in results:
+        home_points = float(result['homePts'])
+        away_points = float(result['awayPts'])
+        for team_id, scored, allowed in ((result['home'], home_points, away_points),
+                                         (result['away'], away_points, home_points)):
+            record = records.get(team_id)
+            if record is None:
+                continue
+            outcome = 'W' if scored > allowed else 'L' if scored < allowed else 'T'
+            record[outcome] += 1
+            record['length'] = record['length'] + 1 if record['streak'] == outcome else 1
+            record['streak'] = outcome
+    rebuilt = []
+    for team in teams:
+        record = records[team['teamAbv']]
+        rebuilt.append(dict(team, wins=record['W'], loss=record['L'], tie=record['T'],
+                            currentStreak={'result': record['streak'], 'length': record['length']}))
+    return rebuilt
+
+
+class SeasonData:
+    """
+    Everything a backtest reads about one season, loaded from a snapshot store without any API call.
+
+    Team records and defensive totals are rebuilt for each week from the final scores and box scores
+    of the games before it, so no replayed week sees later results. Projections are the store's
+    latest copy.
+    """
+
+    def __init__(self, store, season=MATCHUP_SEASON, positions=BACKTEST_POSITIONS):
+        """
+        :param store: A SnapshotStore filled by utils.ingest (projections, teams, schedules, box scores).
+        :param season: Season year to replay.
+        :param positions: Positions of the players replayed.
+        """
+        self.season = season
+        self.projections = store.projections()
+        teams = store.teams()
+        if not self.projections or not teams:
+            raise ValueError(f"Snapshot store {store.path} has no projections or teams, run utils.ingest first.")
+        self.weeks = replayable_weeks(store, season)
+        self.engine = ProjectionEngine(self.projections['body']['playerProjections'])
+
+        self.matchups = {}
+        game_weeks = {}
+        for week in range(1, REGULAR_SEASON_WEEKS + 1):
+            games = store.weekly_games(week, season)
+            if games:
+                self.matchups[week] = WeeklyMatchups(games['body'])
+                for game in games['body']:
+                    game_weeks[game['gameID']] = week
+
+        # Per replayed week: the TeamRepository and DefenseAllowedTable of the games before it
+        self.teams = {}
+        self.defense = {}
+        results = store.game_results(season)
+        totals = {team['teamAbv']: dict.fromkeys(DEFENSE_STAT_LINES, 0.0) for team in teams['body']}
+        lines_by_week = {}
+        for _, game_id, line in store.game_lines(game_weeks):
+            lines_by_week.setdefault(game_weeks[game_id], []).append(line)
+        # Replayable weeks run consecutively from week 2, each adds the week before it to the totals
+        for week in self.weeks:
+            self.teams[week] = TeamRepository(team_records(teams['body'],
+                                                           [result for result in results if result['week'] < week]))
+            for line in lines_by_week.get(week - 1, []):
+                opponent = self.matchups[week - 1].opponent(line.get('teamAbv') or line.get('team'))
+                if opponent in totals:
+                    for stat, (section, key) in DEFENSE_STAT_LINES.items():
+                        totals[opponent][stat] += stat_value(line, section, key)
+            self.defense[week] = DefenseAllowedTable.from_totals(totals)
+
+        # Per player: its PlayerRecord and its (week, GameRecord) pairs in week order
+        self.players = {}
+        self.games = {}
+        for player_id, projection in self.projections['body']['playerProjections'].items():
+            if projection.get('pos') not in positions:
+                continue
+            log = store.player_games(player_id)
+            if not log:
+                continue
+            games = [(game_weeks[game_id], GameRecord(game_id, game))
+                     for game_id, game in log['body'].items() if game_id in game_weeks]
+            if games:
+                self.players[player_id] = PlayerRecord(projection)
+                self.games[player_id] = sorted(games, key=lambda game: game[0])
+
+
+_season_data = None
+
+
+def _init_worker(store_path, season, positions):
+    global _season_data
+    _season_data = SeasonData(SnapshotStore(store_path), season, positions)
+
+
+def backtest_week(week, scoring_profile=None, data=None):
+    """
+    Replays the compare_players model for every player who played in a week, using only the games
+    played before it. Weeks the store cannot cover that way (see replayable_weeks) replay nothing.
+
+    :param week: The week to predict (2 or later, the model averages over week - 1 games).
+    :param scoring_profile: A profile name or dict from utils.scoring_profiles (default: API PPR points).
+    :param data: The SeasonData (default: the one loaded by this worker process).
+    :return: List of (player ID, position, week, predicted score, actual points).
+    """
+    data = data or _season_data
+    matchups = data.matchups.get(week)
+    if matchups is None or week not in data.defense:
+        return []
+
+    context = ComparisonContext(week, engine=data.engine, teams=data.teams[week],
+                                matchups=matchups, defense=data.defense[week], scoring_profile=scoring_profile)
+    rows = []
+    for player_id, games in data.games.items():
+        actual = [game for game_week, game in games if game_week == week]
+        if not actual:
+            continue
+        # Most recent first, like getNFLGamesForPlayer with number_of_games=week-1
+        prior = [game for game_week, game in reversed(games) if game_week < week][:week - 1]
+        player = data.players[player_id]
+        snapshot = PlayerSnapshot(player_id, player.name, week, player, GameLog.from_records(player_id, prior),
+                                  scoring_profile=scoring_profile)
+        score = score_player(snapshot, context)
+        if 'error' in score:
+            continue
+        rows.append((player_id, player.position, week, score['score'], actual[0].points(scoring_profile)))
+    return rows
+
+
+def pairwise_accuracy(predicted, actual):
+    """
+    Share of pairs the model orders the same way as the actual points, i.e. how often the player
+    compare_players says to start really outscored the other. Pairs tied in either are skipped.
+    """
+    predicted_order = np.sign(predicted[:, np.newaxis] - predicted[np.newaxis, :])
+    actual_order = np.sign(actual[:, np.newaxis] - actual[np.newaxis, :])
+    decided = np.triu((predicted_order != 0) & (actual_order != 0), k=1)
+    pairs = int(decided.sum())
+    if pairs == 0:
+        return None, 0
+    return float((predicted_order == actual_order)[decided].mean()), pairs
+
+
+def summarize(rows):
+    """
+    Computes accuracy metrics of backtest rows, overall and per position.
+
+    Pairwise accuracy only compares players at the same position in the same week.
+
+    :param rows: Rows from backtest_week.
+    :return: Dict mapping 'ALL' and each position to a dict of metrics.
+    """
+    report = {}
+    for group in ('ALL',) + BACKTEST_POSITIONS:
+        selected = [row for row in rows if group == 'ALL' or row[1] == group]
+        if not selected:
+            continue
+        predicted = np.array([row[3] for row in selected], dtype=np.float64)
+        actual = np.array([row[4] for row in selected], dtype=np.float64)
+        errors = predicted - actual
+
+        correct = 0.0
+        pairs = 0
+        keys = sorted({(row[1], row[2]) for row in selected})
+        for position, week in keys:
+            mask = np.array([row[1] == position and row[2] == week for row in selected])
+            accuracy, count = pairwise_accuracy(predicted[mask], actual[mask])
+            if count:
+                correct += accuracy * count
+                pairs += count
+
+        report[group] = {
+            'predictions': len(selected),
+            'mae': float(np.abs(errors).mean()),
+            'rmse': float(np.sqrt((errors ** 2).mean())),
+            'bias': float(errors.mean()),
+            'correlation': float(np.corrcoef(predicted, actual)[0, 1]) if len(selected) > 1 else None,
+            'pairwise_accuracy': correct / pairs if pairs else None,
+            'pairs': pairs,
+        }
+    return report
+
+
+def run_backtest(store_path=DEFAULT_STORE_PATH, season=MATCHUP_SEASON, weeks=None, workers=None,
+                 scoring_profile=None, positions=BACKTEST_POSITIONS):
+    """
+    Replays the model over a season's weeks across a process pool, one week per task.
+
+    :param store_path: Path of the SnapshotStore to read.
+    :param season: Season year to replay.
+    :param weeks: Weeks to predict (default: 2 through 18).
+    :param workers: Worker processes (default: one per CPU).
+    :param scoring_profile: A profile name or dict from utils.scoring_profiles (default: API PPR points).
+    :param positions: Positions of the players replayed.
+    :return: Tuple of (all rows from backtest_week, summarize() report), or None if the store is not ingested.
+    """
+    # Checked here, a worker failing to load its data would only surface as a broken pool
+    store = SnapshotStore(store_path)
+    if not store.projections() or not store.teams() or not store.weekly_games(1, season):
+        print(f"Snapshot store {store_path} has no projections, teams or {season} schedules, run utils.ingest first.")
+        return None
+
+    weeks = list(weeks or range(2, REGULAR_SEASON_WEEKS + 1))
+    replayable = replayable_weeks(store, season, weeks)
+    skipped = sorted(set(weeks) - set(replayable))
+    if skipped:
+        print(f"Skipping weeks {', '.join(map(str, skipped))}: games before them have no stored final score, "
+              f"ingest them again with python -m utils.game_logs --force.")
+    weeks = replayable
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(store_path, season, positions)) as executor:
+        rows = [row for week_rows in executor.map(backtest_week, weeks, repeat(scoring_profile)) for row in week_rows]
+    return rows, summarize(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the comparison model over a season from a snapshot store.")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help="Path of the SQLite store (see utils.ingest).")
+    parser.add_argument('--season', type=int, default=MATCHUP_SEASON, help="Season year to replay.")
+    parser.add_argument('--weeks', type=int, nargs='*', help="Weeks to predict (default: 2-18).")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes.")
+    parser.add_argument('--scoring', choices=list(SCORING_PROFILES), help="Scoring format (default: API PPR).")
+    args = parser.parse_args()
+    if args.weeks and min(args.weeks) < 2:
+        parser.error("weeks must be 2 or later, the model averages over the weeks before")
+
+    start = time.perf_counter()
+    backtest = run_backtest(args.store, args.season, args.weeks, args.workers, args.scoring)
+    if backtest is None:
+        raise SystemExit(1)
+    results, summary = backtest
+    elapsed = time.perf_counter() - start
+
+    print(f"Replayed {len(results)} player-weeks in {elapsed:.2f}s")
+    print(f"{'Group':<6}{'Preds':>8}{'MAE':>8}{'RMSE':>8}{'Bias':>8}{'Corr':>8}{'Pairwise':>10}")
+    for name, metrics in summary.items():
+        correlation = metrics['correlation']
+        accuracy = metrics['pairwise_accuracy']
+        print(f"{name:<6}{metrics['predictions']:>8}{metrics['mae']:>8.2f}{metrics['rmse']:>8.2f}"
+              f"{metrics['bias']:>8.2f}{'' if correlation is None else f'{correlation:.3f}':>8}"
+              f"{'' if accuracy is None else f'{accuracy:.1%}':>10}")
@@ -0,0 +1,566 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds each endpoint's responses stay fresh. League-wide data barely moves within a day,
+# player game logs change once a week, the weekly schedule changes during game day and box
+# scores are only ingested once their game is completed.
+ENDPOINT_TTLS = {
+    'getNFLProjections': 6 * 60 * 60,
+    'getNFLTeams': 6 * 60 * 60,
+    'getNFLGamesForPlayer': 60 * 60,
+    'getNFLGamesForWeek': 30 * 60,
+    'getNFLPlayerInfo': 24 * 60 * 60,
+    'getNFLBoxScore': 24 * 60 * 60,
+}
+DEFAULT_TTL = 60 * 60
+
+# League-wide datasets are served stale while a background refresh runs, instead of making the
+# request that finds them expired wait for the download. Past MAX_STALE seconds a request fetches.
+STALE_WHILE_REVALIDATE = {'getNFLProjections', 'getNFLTeams', 'getNFLGamesForWeek'}
+MAX_STALE = int(os.getenv("API_CACHE_MAX_STALE", str(24 * 60 * 60)))
+
+# With a shared store (API_CACHE_DB) a worker keeps only the league-wide responses in memory, the
+# ones its derived indexes hold on to anyway, and reads everything else from the store. Its other
+# in-process caches default to this size too, so memory per worker no longer grows with traffic.
+SHARED_CACHE = bool(os.getenv("API_CACHE_DB"))
+LOCAL_CACHE_ENTRIES = int(os.getenv("API_CACHE_LOCAL_ENTRIES", "32"))
+
+# With a shared store the cache warmer also publishes the season projections as a memory-mapped
+# columnar snapshot here (see utils.columnar_export). Workers open the projection engine and player
+# index over it, so those pages exist once per host instead of once per worker.
+LEAGUE_SNAPSHOT_DIR = os.getenv("LEAGUE_SNAPSHOT_DIR") or (
+    os.path.join(os.path.dirname(os.path.abspath(os.getenv("API_CACHE_DB"))), 'league') if SHARED_CACHE else None)
+
+
+def make_cache_key(endpoint, params):
+    """
+    Builds a stable cache key from an endpoint name and its query parameters.
+
+    :param endpoint: The Tank01 endpoint name (e.g., 'getNFLProjections').
+    :param params: Dict of query parameters. None values are dropped and booleans are lowercased.
+    :return: A string key that is identical for equivalent parameter sets.
+    """
+    normalized = {}
+    for name, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = str(value).lower()
+        normalized[name] = str(value)
+    return f"{endpoint}?{json.dumps(normalized, sort_keys=True)}"
+
+
+class DiskCacheStore:
+    """
+    Keeps cache entries as JSON files in a directory so they survive restarts.
+
+    Each file's modification time is set to its entry's expiry, so entries too old to be served
+    stale (MAX_STALE) are found and removed without reading them, at most every PRUNE_INTERVAL seconds.
+    """
+    PRUNE_INTERVAL = 10 * 60
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._next_prune = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'r') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return entry['expires_at'], entry['value']
+
+    def set(self, key, expires_at, value):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as file:
+                json.dump({'key': key, 'expires_at': expires_at, 'value': value}, file)
+            os.utime(tmp_path, (expires_at, expires_at))
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as err:
+            print(f"Could not write cache entry to disk: {err}")
+        self.prune()
+
+    def prune(self, force=False):
+        """
+        Removes the entries that expired more than MAX_STALE seconds ago, and leftover temporary files.
+
+        :param force: Prune even if the last prune was less than PRUNE_INTERVAL seconds ago.
+        """
+        now = time.time()
+        if not force and now < self._next_prune:
+            return
+        self._next_prune = now + self.PRUNE_INTERVAL
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError as err:
+            print(f"Could not prune disk cache: {err}")
+            return
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < now - MAX_STALE:
+                    os.remove(entry.path)
+            except OSError:
+                # Removed by another process meanwhile
+                pass
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+class SqliteCacheStore:
+    """
+    Keeps cache entries in one SQLite file shared by every worker process on the host.
+
+    A response fetched by one worker is read by the others instead of being downloaded again.
+    Leases let a single process take on shared chores such as refreshing the league-wide data.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as connection:
+            connection.executescript(
+                'CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, expires_at REAL, value TEXT);'
+                'CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);'
+                'CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT, expires_at REAL);')
+
+    def _connection(self):
+        # One connection per thread and per process, WAL lets readers run while a worker writes
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key):
+        try:
+            row = self._connection().execute('SELECT expires_at, value FROM entries WHERE key = ?',
+                                             (key,)).fetchone()
+        except sqlite3.Error as err:
+            print(f"Could not read shared cache entry: {err}")
+            return None
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def expires_at(self, key):
+        try:
+            row = self._connection().execute('SELECT expires_at FROM entries WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error as err:
+            print(f"Could not read shared cache entry: {err}")
+            return None
+        return row[0] if row is not None else None
+
+    def set(self, key, expires_at, value):
+        try:
+            with self._connection() as connection:
+                connection.execute('INSERT OR REPLACE INTO entries (key, expires_at, value) VALUES (?, ?, ?)',
+                                   (key, expires_at, json.dumps(value)))
+                # Entries too old to be served stale are dropped so the file does not grow forever
+                connection.execute('DELETE FROM entries WHERE expires_at < ?', (time.time() - MAX_STALE,))
+        except (sqlite3.Error, TypeError) as err:
+            print(f"Could not write shared cache entry: {err}")
+
+    def delete(self, key):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def acquire_lease(self, name, seconds):
+        """
+        Takes or renews a named lease for this process.
+
+        :param name: The lease name.
+        :param seconds: How long the lease holds unless renewed.
+        :return: True if this process holds the lease.
+        """
+        now = time.time()
+        try:
+            with self._connection() as connection:
+                cursor = connection.execute(
+                    'INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) '
+                    'ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+                    'WHERE leases.owner = excluded.owner OR leases.expires_at < ?',
+                    (name, self.owner, now + seconds, now))
+        except sqlite3.Error as err:
+            print(f"Could not acquire lease {name}: {err}")
+            return False
+        return cursor.rowcount == 1
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a per-entry TTL.
+
+    An optional backing store (e.g. DiskCacheStore) is consulted on a memory miss and written
+    through on every set, so warm entries survive process restarts. Expired entries stay until
+    evicted, get_stale() can still return them.
+    """
+
+    def __init__(self, max_entries=256, store=None, keep_local=None):
+        """
+        :param max_entries: Most entries kept in memory.
+        :param store: Backing store (optional).
+        :param keep_local: With a store, predicate choosing which keys are also kept in memory
+                           (default: every key).
+        """
+        self.max_entries = max_entries
+        self.store = store
+        self.keep_local = keep_local
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None if it is missing or expired.
+        """
+        return self._lookup(key, time.time())
+
+    def get_stale(self, key, max_stale=MAX_STALE):
+        """
+        Returns the cached value for key even if it expired up to max_stale seconds ago, or None.
+        """
+        return self._lookup(key, time.time() - max_stale)
+
+    def _lookup(self, key, not_expired_before):
+        # Expired entries are kept until evicted so they can still be served stale
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[0] > not_expired_before:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        if self.store is not None:
+            entry = self.store.get(key)
+            if entry is not None and entry[0] > not_expired_before:
+                with self._lock:
+                    self._remember(key, entry)
+                return entry[1]
+        return None
+
+    def expires_at(self, key):
+        """
+        Returns when the entry under key expires (it may already be stale), or None if it is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry[0]
+        if self.store is None:
+            return None
+        if hasattr(self.store, 'expires_at'):
+            return self.store.expires_at(key)
+        entry = self.store.get(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key, value, ttl):
+        """
+        Stores value under key for ttl seconds, evicting the least recently used entry when full.
+        """
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, (expires_at, value))
+        if self.store is not None:
+            self.store.set(key, expires_at, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def release(self, key):
+        """
+        Drops the value kept in memory under key but remembers when it expires, for callers that
+        keep their own parsed copy of it versioned on expires_at(). A later get() reads the store
+        again, or misses.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key, entry):
+        if self.keep_local is not None and not self.keep_local(key):
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key so only one of them does the work.
+
+    The first caller for a key runs the function; callers arriving while it is in flight wait
+    for it and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'done': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = func()
+            return call['result']
+        except BaseException as err:
+            call['error'] = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+
+def is_league_wide(key):
+    """
+    Tells whether a cache key is for league-wide data (season projections, teams, a week's games)
+    rather than a single player or team.
+    """
+    endpoint, _, params = key.partition('?')
+    return endpoint in STALE_WHILE_REVALIDATE and '"player_id"' not in params and '"team_id"' not in params
+
+
+def keep_local(key):
+    """
+    Tells whether a worker sharing the store keeps a response in memory: league-wide data, except
+    the season projections once they are read from the published snapshot instead.
+    """
+    if LEAGUE_SNAPSHOT_DIR and key.startswith('getNFLProjections?'):
+        return False
+    return is_league_wide(key)
+
+
+def _build_response_cache():
+    cache_db = os.getenv("API_CACHE_DB")
+    cache_dir = os.getenv("API_CACHE_DIR")
+    if cache_db:
+        return TTLCache(max_entries=LOCAL_CACHE_ENTRIES, store=SqliteCacheStore(cache_db),
+                        keep_local=keep_local)
+    store = DiskCacheStore(cache_dir) if cache_dir else None
+    return TTLCache(max_entries=int(os.getenv("API_CACHE_MAX_ENTRIES", "256")), store=store)
+
+
+# Shared cache in front of every Tank01 fetcher. Set API_CACHE_DIR to persist it on disk, or
+# API_CACHE_DB to share it between the worker processes on a host.
+response_cache = _build_response_cache()
+# Concurrent misses for the same key share one upstream request
+inflight_requests = SingleFlight()
+
+
+def data_version(keys, cache=None):
+    """
+    Identifies the exact cached responses a result was computed from.
+
+    The version changes whenever any of the responses is refreshed, so it can serve as an ETag
+    or as the invalidation key of a derived result.
+
+    :param keys: Cache keys of the responses, from a cached fetcher's cache_key().
+    :param cache: The TTLCache holding them (default: response_cache).
+    :return: Tuple of (version string, time the newest response was fetched), or None if any
+             of the responses is not cached or has expired (it is about to be refetched).
+    """
+    cache = cache or response_cache
+    now = time.time()
+    parts = []
+    fetched_at = 0.0
+    for key in sorted(keys):
+        expires_at = cache.expires_at(key)
+        if expires_at is None or expires_at <= now:
+            return None
+        endpoint = key.split('?', 1)[0]
+        fetched_at = max(fetched_at, expires_at - ENDPOINT_TTLS.get(endpoint, DEFAULT_TTL))
+        parts.append(f"{key}@{expires_at!r}")
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest(), fetched_at
+
+
+def cached_endpoint(endpoint):
+    """
+    Decorator that caches a fetcher's successful responses keyed on endpoint plus call arguments.
+
+    Arguments are bound against the fetcher's signature (defaults included), so
+    f(week='season') and f() share one entry. Concurrent misses for the same key wait on a
+    single in-flight fetch. Failed fetches (None) are never cached.
+
+    Endpoints in STALE_WHILE_REVALIDATE return an expired response right away and refresh it in a
+    background thread. The decorated fetcher gets a refresh(*args, **kwargs) attribute that always
+    fetches and replaces the cached entry, for the cache warmer, and a cache_key(*args, **kwargs)
+    attribute returning the key a call is cached under.
+
+    :param endpoint: The Tank01 endpoint name, used for the key and to look up the TTL.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        var_keyword = [name for name, param in signature.parameters.items()
+                       if param.kind is inspect.Parameter.VAR_KEYWORD]
+
+        ttl = ENDPOINT_TTLS.get(endpoint, DEFAULT_TTL)
+
+        def cache_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            for name in var_keyword:
+                params.update(params.pop(name, {}))
+            return make_cache_key(endpoint, params)
+
+        def fetch_and_store(args, kwargs):
+            data = func(*args, **kwargs)
+            if data is not None:
+                response_cache.set(cache_key(args, kwargs), data, ttl)
+            return data
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = cache_key(args, kwargs)
+            cached = response_cache.get(key)
+            if cached is not None:
+                return cached
+
+            if endpoint in STALE_WHILE_REVALIDATE:
+                stale = response_cache.get_stale(key)
+                if stale is not None:
+                    if not inflight_requests.in_flight(key):
+                        threading.Thread(target=inflight_requests.do, args=(key, lambda: fetch_and_store(args, kwargs)),
+                                         name=f'revalidate-{endpoint}', daemon=True).start()
+                    return stale
+
+            def fetch():
+                # Another caller may have filled the cache while this one waited for the lock
+                data = response_cache.get(key)
+                if data is None:
+                    data = fetch_and_store(args, kwargs)
+                return data
+
+            return inflight_requests.do(key, fetch)
+
+        def refresh(*args, **kwargs):
+            """
+            Fetches the response again and replaces the cached entry, ignoring its freshness.
+
+            :return: The new response, or None if the fetch failed (the old entry is kept).
+            """
+            return inflight_requests.do(cache_key(args, kwargs), lambda: fetch_and_store(args, kwargs))
+
+        wrapper.refresh = refresh
+        wrapper.cache_key = lambda *args, **kwargs: cache_key(args, kwargs)
+        return wrapper
+
+    return decorator
+
+
+def derived_from(loader, build, cache_key=None):
+    """
+    Shares an object built from a cached response across the process, e.g. an index over it.
+
+    The object is rebuilt only when the loader returns a different response object, i.e. when the
+    response cache refreshed it, so the response's TTL is the rebuild schedule. If the fetch fails,
+    the last built object is returned.
+
+    With cache_key, the object is versioned on the response's expiry instead and the response is
+    released from memory once built, so a large response is not kept next to its index. An
+    expired object is still served while the response is refetched in the background, up to
+    MAX_STALE seconds, like a STALE_WHILE_REVALIDATE response.
+
+    :param loader: Function fetching the response, usually a cached endpoint.
+    :param build: Function building the object from the response's 'body'.
+    :param cache_key: Function returning the response_cache key loader(*args) reads (optional).
+    :return: A function get(*args, data=None) returning the object built from loader(*args), or from
+             data when an already fetched response is given. One object is kept per distinct args,
+             get.clear() drops them.
+    """
+    built = {}
+    lock = threading.Lock()
+
+    def revalidate(args):
+        data = loader(*args)
+        if data:
+            get(*args, data=data)
+
+    def get(*args, data=None):
+        if data is None and cache_key is not None:
+            key = cache_key(*args)
+            expires_at = response_cache.expires_at(key)
+            entry = built.get(args)
+            if entry is not None and expires_at is not None and entry[0] == expires_at:
+                now = time.time()
+                if expires_at > now:
+                    return entry[1]
+                if expires_at > now - MAX_STALE:
+                    if not inflight_requests.in_flight(key):
+                        threading.Thread(target=revalidate, args=(args,), name='revalidate-derived',
+                                         daemon=True).start()
+                    return entry[1]
+        if data is None:
+            data = loader(*args)
+        if not data or 'body' not in data:
+            entry = built.get(args)
+            return entry[1] if entry else None
+
+        with lock:
+            entry = built.get(args)
+            if cache_key is None:
+                if entry is None or entry[0] is not data:
+                    entry = (data, build(data['body']))
+                    built[args] = entry
+                return entry[1]
+
+            key = cache_key(*args)
+            expires_at = response_cache.expires_at(key)
+            if entry is None or entry[0] != expires_at:
+                entry = (expires_at, build(data['body']))
+                built[args] = entry
+            response_cache.release(key)
+            return entry[1]
+
+    def clear():
+        with lock:
+            built.clear()
+
+    get.clear = clear
+    return get
@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+
+from utils.api_calls import get_fantasy_point_projections, get_nfl_games_for_week, get_nfl_teams
+from utils.cache import ENDPOINT_TTLS, LEAGUE_SNAPSHOT_DIR, response_cache
+from utils.columnar import MANIFEST_FILE, PLAYER_INDEX_DIR, PROJECTIONS_DIR
+from utils.columnar_export import write_player_index_columns, write_projection_columns
+from utils.matchups import MATCHUP_SEASON, current_week, get_defense_allowed, get_weekly_matchups
+from utils.player_index import get_player_index
+from utils.scoring_engine import get_projection_engine
+from utils.teams import TEAM_FETCH_PARAMS, get_team_repository
+
+# Seconds between checks for due refreshes
+WARM_TICK = float(os.getenv("CACHE_WARM_TICK", "60"))
+# Each dataset is refreshed once this fraction of its TTL has passed, well before it expires
+REFRESH_FRACTION = float(os.getenv("CACHE_WARM_REFRESH_FRACTION", "0.5"))
+# Lease name for the one worker per host that downloads refreshes into a shared cache
+WARMER_LEASE = 'cache-warmer'
+
+
+def rebuild_projection_indexes(data):
+    # Rebuild the derived indexes here, off the request path
+    get_projection_engine(data)
+    get_player_index()
+
+
+def publish_projections(data):
+    projections = data['body'].get('playerProjections', {})
+    write_projection_columns(projections, LEAGUE_SNAPSHOT_DIR)
+    write_player_index_columns(projections, LEAGUE_SNAPSHOT_DIR)
+
+
+def rebuild_team_indexes(data):
+    get_team_repository(data)
+    get_defense_allowed(data)
+
+
+def current_week_params():
+    return {'week': current_week(), 'season_type': "reg", 'season': str(MATCHUP_SEASON)}
+
+
+def rebuild_current_week(data):
+    get_weekly_matchups(current_week(), data=data)
+
+
+# (name, cached fetcher, function returning its keyword arguments, derived index rebuild, seconds between refreshes)
+WARM_JOBS = [
+    ('projections', get_fantasy_point_projections, lambda: {'week': 'season'}, rebuild_projection_indexes,
+     ENDPOINT_TTLS['getNFLProjections'] * REFRESH_FRACTION),
+    ('teams', get_nfl_teams, lambda: TEAM_FETCH_PARAMS, rebuild_team_indexes,
+     ENDPOINT_TTLS['getNFLTeams'] * REFRESH_FRACTION),
+    ('current_week', get_nfl_games_for_week, current_week_params, rebuild_current_week,
+     ENDPOINT_TTLS['getNFLGamesForWeek'] * REFRESH_FRACTION),
+]
+
+# Jobs whose refresh the leader also publishes as a columnar snapshot under LEAGUE_SNAPSHOT_DIR, with
+# the tables that must exist before the other workers open it instead of loading the response
+SNAPSHOT_JOBS = {
+    'projections': (publish_projections, (PROJECTIONS_DIR, PLAYER_INDEX_DIR)),
+} if LEAGUE_SNAPSHOT_DIR else {}
+
+
+def snapshot_published(name):
+    tables = SNAPSHOT_JOBS[name][1]
+    return all(os.path.exists(os.path.join(LEAGUE_SNAPSHOT_DIR, table, MANIFEST_FILE)) for table in tables)
+
+
+class CacheWarmer:
+    """
+    Background thread that pre-fetches the league-wide datasets at startup and refreshes each one
+    on its own schedule, so user requests always find them in the cache.
+
+    A failed refresh keeps the previous response and is retried on the next tick. When the response
+    cache is shared between workers (API_CACHE_DB), only the worker holding the warmer lease
+    downloads; the others load what it published and rebuild their own indexes. The season
+    projections are also published as a columnar snapshot (LEAGUE_SNAPSHOT_DIR), which every
+    worker opens memory-mapped instead of building its own copy.
+    """
+
+    def __init__(self, jobs=None, tick=WARM_TICK, cache=response_cache):
+        """
+        :param jobs: List of jobs shaped like WARM_JOBS (default: WARM_JOBS).
+        :param tick: Seconds between checks for due jobs.
+        :param cache: The TTLCache the fetchers write to.
+        """
+        self.jobs = jobs if jobs is not None else WARM_JOBS
+        self.tick = tick
+        self.cache = cache
+        self.next_run = {job[0]: 0.0 for job in self.jobs}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def is_leader(self):
+        """
+        Returns True if this process should download refreshes, renewing its lease on a shared cache.
+        """
+        acquire_lease = getattr(self.cache.store, 'acquire_lease', None)
+        if acquire_lease is None:
+            return True
+        return acquire_lease(WARMER_LEASE, self.tick * 3)
+
+    def run_once(self):
+        """
+        Runs every job that is due.
+        """
+        leader = self.is_leader()
+        for name, fetcher, params, rebuild, interval in self.jobs:
+            now = time.monotonic()
+            if now < self.next_run[name]:
+                continue
+            try:
+                kwargs = params()
+                if leader:
+                    data = fetcher.refresh(**kwargs)
+                    if data is not None and name in SNAPSHOT_JOBS:
+                        SNAPSHOT_JOBS[name][0](data)
+                elif name in SNAPSHOT_JOBS and snapshot_published(name):
+                    # Open the leader's snapshot rather than loading the response into this worker
+                    rebuild(None)
+                    data = None
+                else:
+                    # Only read what the leader published, never download from a follower
+                    data = self.cache.get(fetcher.cache_key(**kwargs))
+                if data is not None:
+                    rebuild(data)
+            except Exception as err:
+                print(f"Cache warmer could not refresh {name}: {err}")
+                data = None
+            if data is None or not leader:
+                # Followers check every tick so they pick up the leader's refresh off the request path
+                self.next_run[name] = now + self.tick
+            else:
+                self.next_run[name] = now + interval
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.tick)
+
+    def start(self, prefetch=False):
+        """
+        Starts the refresh thread.
+
+        :param prefetch: Run the first refresh in the calling thread, so every dataset is cached
+                         before this returns (e.g. before a server worker accepts requests).
+        """
+        if self._thread is None or not self._thread.is_alive():
+            if prefetch:
+                self.run_once()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='cache-warmer', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def start_cache_warmer(prefetch=False):
+    """
+    Starts the shared CacheWarmer once per process. Servers start it on startup; scripts, tests and
+    benchmarks that must not spend API quota in the background opt out with CACHE_WARMER=0.
+
+    :param prefetch: Download the league-wide datasets before returning, see CacheWarmer.start.
+    :return: The running CacheWarmer, or None when disabled.
+    """
+    global _warmer
+    if _warmer is not None:
+        return _warmer
+    if os.getenv("CACHE_WARMER", "1") != "1":
+        return None
+    with _warmer_lock:
+        if _warmer is None:
+            _warmer = CacheWarmer()
+            _warmer.start(prefetch)
+        return _warmer
@@ -0,0 +1,133 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet output is optional, the .npy columns are always written
+    pyarrow = None
+
+# Tables of a league snapshot directory
+PROJECTIONS_DIR = 'projections'
+GAME_LOGS_DIR = 'game_logs'
+PLAYER_INDEX_DIR = 'player_index'
+
+MANIFEST_FILE = 'manifest.json'
+SIDECAR_FILE = 'rows.json'
+
+
+def publish(directory, write):
+    """
+    Writes a snapshot into a new versioned directory, then atomically repoints the directory
+    (a symlink) at it, so readers always find a complete snapshot under the same path.
+
+    The previous version is kept for readers still opening it, older ones are removed.
+
+    :param directory: The path readers open.
+    :param write: Function writing the snapshot into the directory it is given.
+    """
+    directory = os.path.abspath(directory)
+    parent, name = os.path.split(directory)
+    os.makedirs(parent, exist_ok=True)
+    version = f"{name}.v{time.time_ns()}-{os.getpid()}"
+    write_directory = os.path.join(parent, version)
+    os.makedirs(write_directory)
+    write(write_directory)
+
+    previous = os.readlink(directory) if os.path.islink(directory) else None
+    if previous is None and os.path.isdir(directory):
+        # A snapshot written before versioned directories is moved aside once, it cannot be swapped
+        os.replace(directory, os.path.join(parent, f"{name}.v0-legacy"))
+    link = f"{directory}.link-{os.getpid()}"
+    os.symlink(version, link)
+    os.replace(link, directory)
+
+    for entry in os.listdir(parent):
+        if entry.startswith(f"{name}.v") and entry not in (version, previous):
+            shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+
+
+def write_table(directory, columns, sidecar=None):
+    """
+    Writes typed columns as .npy files plus a JSON sidecar with any other row fields.
+
+    :param directory: The table directory.
+    :param columns: Dict mapping column names to equally long NumPy arrays (numbers or fixed-width strings).
+    :param sidecar: Dict mapping field names to lists, kept as JSON (optional).
+    """
+    sidecar = sidecar or {}
+    if sidecar:
+        rows = len(next(iter(sidecar.values())))
+    else:
+        rows = len(next(iter(columns.values()))) if columns else 0
+    for name, values in columns.items():
+        np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(values))
+    with open(os.path.join(directory, SIDECAR_FILE), 'w') as file:
+        json.dump(sidecar, file)
+    with open(os.path.join(directory, MANIFEST_FILE), 'w') as file:
+        json.dump({'rows': rows, 'columns': list(columns), 'created_at': time.time()}, file)
+
+    if pyarrow is not None:
+        table = pyarrow.table({**sidecar, **{name: np.asarray(values) for name, values in columns.items()}})
+        pyarrow.parquet.write_table(table, os.path.join(directory, 'table.parquet'))
+
+
+class ColumnarTable:
+    """
+    A columnar table opened zero-copy: every column is a read-only memory-mapped array,
+    so processes opening the same snapshot share its pages.
+    """
+
+    def __init__(self, directory):
+        # Resolved once, so every file comes from the same published version
+        directory = os.path.realpath(directory)
+        with open(os.path.join(directory, MANIFEST_FILE)) as file:
+            self.manifest = json.load(file)
+        with open(os.path.join(directory, SIDECAR_FILE)) as file:
+            self.sidecar = json.load(file)
+        self.columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+                        for name in self.manifest['columns']}
+
+    def __len__(self):
+        return self.manifest['rows']
+
+    def __getitem__(self, name):
+        if name in self.columns:
+            return self.columns[name]
+        return self.sidecar[name]
+
+
+def derived_from_published(directory, build):
+    """
+    Shares an object built over a published snapshot across the process, like utils.cache.derived_from:
+    it is rebuilt only when a new version is published under directory.
+
+    :param directory: The path publish() repoints at every new version.
+    :param build: Function building the object from the resolved version directory.
+    :return: A function get() returning the object, or None while nothing has been published.
+    """
+    current = [None]
+    lock = threading.Lock()
+
+    def get():
+        version = os.path.realpath(directory)
+        entry = current[0]
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        with lock:
+            entry = current[0]
+            if entry is None or entry[0] != version:
+                try:
+                    entry = (version, build(version))
+                except (OSError, ValueError, KeyError):
+                    # Nothing published yet, or the version was replaced while it was opened
+                    return entry[1] if entry is not None else None
+                current[0] = entry
+            return entry[1]
+
+    return get
@@ -0,0 +1,95 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from utils.columnar import (GAME_LOGS_DIR, MANIFEST_FILE, PLAYER_INDEX_DIR, PROJECTIONS_DIR, ColumnarTable, publish,
+                            write_table)
+from utils.player_index import PlayerIndex
+from utils.scoring_engine import ProjectionEngine
+from utils.scoring_profiles import STAT_FIELDS, stat_value
+
+
+def write_projection_columns(projections, directory):
+    """
+    Writes the season projections as typed columns under directory/projections.
+
+    :param projections: The 'playerProjections' dict from a season projections response.
+    :param directory: The snapshot root directory.
+    :return: The number of players written.
+    """
+    engine = ProjectionEngine(projections)
+    # Columns are named after the upstream stat keys (rushYds, recTD, ...)
+    columns = {stat: engine.stat_columns[key] for key, _, stat in STAT_FIELDS}
+    columns['weekly_points'] = engine.weekly_points
+    columns['id'] = engine.ids
+    columns['name'] = engine.names
+    columns['pos'] = engine.positions
+    columns['team'] = engine.teams
+    publish(os.path.join(directory, PROJECTIONS_DIR), lambda target: write_table(target, columns))
+    return len(engine)
+
+
+def write_player_index_columns(projections, directory):
+    """
+    Writes the PlayerIndex over the season projections under directory/player_index, one table
+    per lookup structure, published together so readers never mix two versions.
+
+    :param projections: The 'playerProjections' dict from a season projections response.
+    :param directory: The snapshot root directory.
+    :return: The number of players indexed.
+    """
+    index = PlayerIndex(projections)
+
+    def write(target):
+        tables = index.tables()
+        for name, columns in tables.items():
+            os.makedirs(os.path.join(target, name))
+            write_table(os.path.join(target, name), columns)
+        with open(os.path.join(target, MANIFEST_FILE), 'w') as file:
+            json.dump({'rows': len(index), 'tables': list(tables), 'created_at': time.time()}, file)
+
+    publish(os.path.join(directory, PLAYER_INDEX_DIR), write)
+    return len(index)
+
+
+def write_game_log_columns(game_logs, directory):
+    """
+    Writes per-game stat lines as typed columns under directory/game_logs.
+
+    :param game_logs: Dict mapping a player ID to its game log response, from getNFLGamesForPlayer
+                      or SnapshotStore.player_games.
+    :param directory: The snapshot root directory.
+    :return: The number of games written.
+    """
+    sidecar = {'player_id': [], 'game_id': []}
+    values = {stat: [] for _, _, stat in STAT_FIELDS}
+    values['ppr_points'] = []
+    for player_id, games in game_logs.items():
+        if not games or not games.get('body'):
+            continue
+        for game_id, game in games['body'].items():
+            sidecar['player_id'].append(player_id)
+            sidecar['game_id'].append(game_id)
+            for _, section, stat in STAT_FIELDS:
+                values[stat].append(stat_value(game, section, stat))
+            values['ppr_points'].append(stat_value(game, 'fantasyPointsDefault', 'PPR'))
+
+    columns = {name: np.array(column, dtype=np.float64) for name, column in values.items()}
+    publish(os.path.join(directory, GAME_LOGS_DIR), lambda target: write_table(target, columns, sidecar))
+    return len(sidecar['game_id'])
+
+
+def load_columnar_snapshot(directory):
+    """
+    Opens the projections (and game logs, when present) written under a snapshot directory.
+
+    :param directory: The snapshot root directory.
+    :return: Dict with 'projections' and optionally 'game_logs' ColumnarTables.
+    """
+    tables = {'projections': ColumnarTable(os.path.join(directory, PROJECTIONS_DIR))}
+    game_logs = os.path.join(directory, GAME_LOGS_DIR)
+    if os.path.exists(os.path.join(game_logs, MANIFEST_FILE)):
+        tables['game_logs'] = ColumnarTable(game_logs)
+    return tables
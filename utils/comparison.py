@@ -1,245 +1,438 @@
-from utils.api_calls import (get_fantasy_point_projections, get_nfl_teams, get_nfl_games_for_player,
-                             get_nfl_games_for_week, get_nfl_player_headshot)
+import hashlib
+import os
+from functools import partial
+
+from utils.api_calls import (get_fantasy_point_projections, get_nfl_games_for_player, get_nfl_games_for_week,
+                             get_nfl_player_headshot, get_nfl_teams)
+from utils.cache import DEFAULT_TTL, LOCAL_CACHE_ENTRIES, SHARED_CACHE, TTLCache, data_version
+from utils.game_logs import game_log_version, load_game_log
+from utils.fanout import gather, new_deadline, run_concurrently, start_concurrently
+from utils.matchups import MATCHUP_SEASON, get_defense_allowed, get_weekly_matchups
+from utils.player_index import get_player_index
+from utils.records import load_player
+from utils.scoring_engine import get_projection_engine
+from utils.scoring_profiles import profile_key
+from utils.teams import TEAM_FETCH_PARAMS, fetch_teams, get_team_repository
+
+# Scored pairs keyed on the unordered player pair, week and scoring profile, each stored with the
+# data version it was computed from. Entries only outlive a data refresh until they are next read.
+comparison_results = TTLCache(max_entries=int(os.getenv("COMPARE_CACHE_MAX_ENTRIES",
+                                                        str(LOCAL_CACHE_ENTRIES) if SHARED_CACHE else "2048")))
+
+
+class PlayerSnapshot:
+    """
+    Everything one comparison needs about a single player, fetched exactly once.
+
+    Both the scoring model and the template rendering read from this object.
+    """
 
+    def __init__(self, player_id, name, week, player, game_log, headshot=None, headshot_team=None,
+                 scoring_profile=None):
+        """
+        :param player: The player's PlayerRecord.
+        :param game_log: The player's GameLog or PlayerAggregate for the season so far.
+        """
+        self.player_id = player_id
+        self.name = name
+        self.player = player
+        self.game_log = game_log
+        self.headshot = headshot
+        self.position = player.position
+        self.team_id = player.team
+        # The team from the player info endpoint matches the logo lookup, fall back to the projection team
+        self.team = headshot_team or self.team_id
+        self.team_logo = None
+        self.average_points = calculate_average_fantasy_points(game_log, scoring_profile) / (week - 1)
+        self.last_week_points = get_last_week_performance(game_log, scoring_profile)
+        # Game-to-game spread of the points, the uncertainty utils.simulation puts around the score
+        self.points_spread = game_log.points_spread(scoring_profile)
+
+
+class ComparisonContext:
+    """
+    Per-request snapshot of both players plus the league-wide data the comparison shares.
+    """
 
-def compare_players(player_a_id, player_b_id, week, player_a_name, player_b_name):
+    def __init__(self, week, player_a=None, player_b=None, engine=None, teams=None,
+                 matchups=None, defense=None, scoring_profile=None, error=None, players=None):
+        self.week = week
+        self.scoring_profile = scoring_profile
+        self.player_a = player_a
+        self.player_b = player_b
+        # Every loaded player keyed by ID, for batches loaded with load_many
+        self.players = players or {}
+        # The ProjectionEngine over the season projections
+        self.engine = engine
+        self.teams = teams
+        self.matchups = matchups
+        self.defense = defense
+        self.error = error
+
+    @classmethod
+    def load(cls, player_a_id, player_b_id, week, player_a_name, player_b_name, deadline=None,
+             include_headshots=True, scoring_profile=None):
+        """
+        Fetches every dataset for a comparison once, issuing independent fetches concurrently.
+
+        :param player_a_id: ID of the first player.
+        :param player_b_id: ID of the second player.
+        :param week: Week for comparison.
+        :param player_a_name: Name of the first player (used for the headshot lookup).
+        :param player_b_name: Name of the second player (used for the headshot lookup).
+        :param deadline: Absolute time.monotonic() deadline for all fetches (optional).
+        :param include_headshots: Whether to fetch headshots and team logos for rendering.
+        :param scoring_profile: A profile name or dict from utils.scoring_profiles (default: API PPR points).
+        :return: A ComparisonContext, with error set if required data could not be retrieved.
+        """
+        if deadline is None:
+            deadline = new_deadline()
+
+        tasks = {
+            'engine': get_projection_engine,
+            'teams': fetch_teams,
+            'player_a_recent_games': partial(load_game_log, player_a_id, number_of_games=week-1),
+            'player_b_recent_games': partial(load_game_log, player_b_id, number_of_games=week-1),
+            'matchups': partial(get_weekly_matchups, week),
+        }
+        if include_headshots:
+            tasks['player_a_headshot'] = partial(get_nfl_player_headshot, player_a_name)
+            tasks['player_b_headshot'] = partial(get_nfl_player_headshot, player_b_name)
+        fetched = run_concurrently(tasks, deadline)
+
+        # Positions and teams come from the season projections, only a player missing from them is fetched
+        engine = fetched['engine']
+        records = {}
+        for key, player_id in (('player_a', player_a_id), ('player_b', player_b_id)):
+            record = engine.player(player_id) if engine is not None else None
+            records[key] = record or load_player(player_id)
+        if not records['player_a'] or not records['player_b']:
+            return cls(week, error="Error: Could not retrieve projections for one or both players.")
+        if not fetched['teams']:
+            return cls(week, error="Error: Could not retrieve team information.")
+        if fetched['player_a_recent_games'] is None or fetched['player_b_recent_games'] is None:
+            return cls(week, error="Error: Could not retrieve recent game data for one or both players.")
+
+        player_a_headshot, player_a_team = fetched.get('player_a_headshot') or (None, None)
+        player_b_headshot, player_b_team = fetched.get('player_b_headshot') or (None, None)
+
+        context = cls(
+            week,
+            player_a=PlayerSnapshot(player_a_id, player_a_name, week, records['player_a'],
+                                    fetched['player_a_recent_games'], player_a_headshot, player_a_team,
+                                    scoring_profile),
+            player_b=PlayerSnapshot(player_b_id, player_b_name, week, records['player_b'],
+                                    fetched['player_b_recent_games'], player_b_headshot, player_b_team,
+                                    scoring_profile),
+            engine=engine,
+            teams=get_team_repository(fetched['teams']),
+            matchups=fetched['matchups'],
+            defense=get_defense_allowed(fetched['teams']),
+            scoring_profile=scoring_profile,
+        )
+        if include_headshots:
+            for player in (context.player_a, context.player_b):
+                player.team_logo = get_team_logo(player.team, teams=context.teams)
+        return context
+
+    @classmethod
+    def load_many(cls, players, week, deadline=None, scoring_profile=None, game_logs=None):
+        """
+        Fetches the shared league data once plus every listed player's game log, all concurrently.
+
+        Players' projections are read from the season projections, only players missing from them
+        are fetched one by one.
+
+        :param players: Dict mapping each player ID to its name.
+        :param week: Week for comparison.
+        :param deadline: Absolute time.monotonic() deadline for all fetches (optional).
+        :param scoring_profile: A profile name or dict from utils.scoring_profiles (default: API PPR points).
+        :param game_logs: Dict mapping player IDs to their already loaded game logs, none are fetched then.
+                          Players missing from it are reported as errors (optional).
+        :return: Tuple of (ComparisonContext with the loaded players in .players, dict mapping the
+                 IDs of players that could not be loaded to an error message).
+        """
+        if deadline is None:
+            deadline = new_deadline()
+
+        shared = start_concurrently({
+            'engine': get_projection_engine,
+            'teams': fetch_teams,
+            'matchups': partial(get_weekly_matchups, week),
+        })
+        pending_logs = {} if game_logs is not None else start_concurrently({
+            ('recent_games', player_id): partial(load_game_log, player_id, number_of_games=week-1)
+            for player_id in players
+        })
+        fetched = gather(shared, deadline)
+        if not fetched['teams']:
+            gather(pending_logs, deadline)
+            return cls(week, error="Error: Could not retrieve team information."), {}
+
+        engine = fetched['engine']
+        for player_id in players:
+            fetched[('projections', player_id)] = engine.player(player_id) if engine is not None else None
+        missing = start_concurrently({('projections', player_id): partial(load_player, player_id)
+                                      for player_id in players if fetched[('projections', player_id)] is None})
+        if game_logs is not None:
+            fetched.update({('recent_games', player_id): game_logs.get(player_id) for player_id in players})
+        fetched.update(gather(pending_logs, deadline))
+        fetched.update(gather(missing, deadline))
+
+        loaded = {}
+        errors = {}
+        for player_id, name in players.items():
+            if not fetched[('projections', player_id)]:
+                errors[player_id] = "Error: Could not retrieve projections."
+            elif fetched[('recent_games', player_id)] is None:
+                errors[player_id] = "Error: Could not retrieve recent game data."
+            else:
+                loaded[player_id] = PlayerSnapshot(player_id, name, week, fetched[('projections', player_id)],
+                                                   fetched[('recent_games', player_id)],
+                                                   scoring_profile=scoring_profile)
+
+        context = cls(
+            week,
+            engine=engine,
+            teams=get_team_repository(fetched['teams']),
+            matchups=fetched['matchups'],
+            defense=get_defense_allowed(fetched['teams']),
+            scoring_profile=scoring_profile,
+            players=loaded,
+        )
+        return context, errors
+
+
+def compare_players(player_a_id, player_b_id, week, player_a_name, player_b_name, deadline=None, context=None,
+                    scoring_profile=None):
     """
     Compares two NFL players based on fantasy point projections, team performance, and recent stats.
 
+    Scores are memoized per unordered pair, week and scoring profile until the cached data they
+    were computed from changes, so A vs B and B vs A share one computation.
+
     :param week: Week for comparison
     :param player_a_name: Player name for first player being compared
     :param player_b_name: Player name for second player being compared
     :param player_a_id: ID of the first player to compare.
     :param player_b_id: ID of the second player to compare.
-    :return: A string indicating which player is better for a fantasy start.
+    :param deadline: Absolute time.monotonic() deadline for the upstream fetches (optional).
+    :param context: A loaded ComparisonContext to reuse instead of fetching again (optional).
+    :param scoring_profile: A profile name or dict from utils.scoring_profiles (default: API PPR points).
+    :return: A dict with each player's score components under 'player_a'/'player_b' and the
+             recommended player under 'start', or a dict with an 'error' message.
     """
+    if context is not None:
+        scoring_profile = context.scoring_profile
+    memo_key = (tuple(sorted((str(player_a_id), str(player_b_id)))), week, profile_key(scoring_profile))
+
+    # Reuse the pair's scores while the data they were computed from is unchanged
+    version = comparison_data_version(player_a_id, player_b_id, week)
+    memo = comparison_results.get(memo_key)
+    if memo is not None and version is not None and memo[0] == version[0]:
+        player_a_scores = dict(memo[1][str(player_a_id)], name=player_a_name)
+        player_b_scores = dict(memo[1][str(player_b_id)], name=player_b_name)
+    else:
+        if context is None:
+            context = ComparisonContext.load(player_a_id, player_b_id, week, player_a_name, player_b_name,
+                                             deadline=deadline, include_headshots=False,
+                                             scoring_profile=scoring_profile)
+        if context.error:
+            return {'error': context.error}
+
+        player_a_scores = score_player(context.player_a, context)
+        player_b_scores = score_player(context.player_b, context)
+        for scores in (player_a_scores, player_b_scores):
+            if 'error' in scores:
+                return scores
+
+        version = comparison_data_version(player_a_id, player_b_id, week)
+        if version is not None:
+            scores_by_id = {str(player_a_id): dict(player_a_scores), str(player_b_id): dict(player_b_scores)}
+            comparison_results.set(memo_key, (version[0], scores_by_id), DEFAULT_TTL)
 
-    # 1. Get Fantasy Projections
-    player_a_projections = get_fantasy_point_projections(player_id=player_a_id)
-    player_b_projections = get_fantasy_point_projections(player_id=player_b_id)
-
-    if not player_a_projections or not player_b_projections:
-        return "Error: Could not retrieve projections for one or both players."
-
-    player_a_points = get_player_week_points(player_a_id)
-    player_b_points = get_player_week_points(player_b_id)
-
-    # 2. Get Team Performance
-    teams = get_nfl_teams()
-    if not teams:
-        return "Error: Could not retrieve team information."
-
-    player_a_team_id = get_player_team(player_a_projections)
-    player_b_team_id = get_player_team(player_b_projections)
-
-    # Extract team performance (e.g., win/loss record, standings)
-    player_a_team_stats = get_player_team_stats(player_a_team_id, teams)
-    # print(player_a_team_stats)
-    player_b_team_stats = get_player_team_stats(player_b_team_id, teams)
-    # print(player_b_team_stats)
-
-    if not player_a_team_stats or not player_b_team_stats:
-        return "Error: Could not retrieve team stats for one or both players."
+    # 7. Compare and Return the Result
+    start = 'player_a' if player_a_scores['score'] > player_b_scores['score'] else 'player_b'
+    return {'week': week, 'player_a': player_a_scores, 'player_b': player_b_scores, 'start': start}
 
-    player_a_updated_proj = player_a_points * player_a_team_stats
-    player_b_updated_proj = player_b_points * player_b_team_stats
 
-    # 3. Get Recent Player Performance
-    player_a_recent_games = get_nfl_games_for_player(player_a_id, number_of_games=week-1)
-    player_b_recent_games = get_nfl_games_for_player(player_b_id, number_of_games=week-1)
+def comparison_data_version(player_a_id, player_b_id, week):
+    """
+    Returns the version of the cached data a comparison reads, without fetching anything.
 
-    if not player_a_recent_games or not player_b_recent_games:
-        return "Error: Could not retrieve recent game data for one or both players."
+    :return: Tuple of (version string, time the newest response was fetched) from
+             utils.cache.data_version, or None if some of the data is not cached yet.
+    """
+    keys = [
+        get_fantasy_point_projections.cache_key(week='season'),
+        get_nfl_teams.cache_key(**TEAM_FETCH_PARAMS),
+        get_nfl_games_for_week.cache_key(week=week, season_type="reg", season=str(MATCHUP_SEASON)),
+    ]
+    store_version = game_log_version()
+    if store_version is None:
+        for player_id in (player_a_id, player_b_id):
+            keys.append(get_nfl_games_for_player.cache_key(player_id, number_of_games=week-1))
+    version = data_version(keys)
+    if version is None or store_version is None:
+        return version
+
+    # Game logs come from the box score store, whose version is the time of its last ingest
+    combined = hashlib.sha1(f"{version[0]}|{store_version}".encode('utf-8')).hexdigest()
+    return combined, max(version[1], float(store_version))
+
+
+def score_player(player, context):
+    """
+    Scores one player from a loaded ComparisonContext.
 
-    player_a_season_performance = calculate_average_fantasy_points(player_a_recent_games)/(week - 1)
-    player_b_season_performance = calculate_average_fantasy_points(player_b_recent_games)/(week - 1)
+    :param player: The PlayerSnapshot to score.
+    :param context: The ComparisonContext holding the shared league data.
+    :return: A dict of the score components and final 'score', or a dict with an 'error' message.
+    """
+    # 1. Get Fantasy Projections
+    points = context.engine.points(player.player_id, context.scoring_profile) if context.engine is not None else None
 
-    # Get just last week
-    player_a_last_week_performance = get_last_week_performance(player_a_recent_games)
-    player_b_last_week_performance = get_last_week_performance(player_b_recent_games)
+    # 2. Get Team Performance
+    team_multiplier = get_player_team_stats(player.team_id, context.teams)
+    if points is None or not team_multiplier:
+        return {'error': "Error: Could not retrieve team stats for one or both players."}
+    updated_projection = points * team_multiplier
 
-    # 4. Calculate Final Scores
-    player_a_solo_predicted_score = (player_a_updated_proj + player_a_season_performance +
-                                     player_a_last_week_performance)/3
-    player_b_solo_predicted_score = (player_b_updated_proj + player_b_season_performance +
-                                     player_b_last_week_performance)/3
+    # 3./4. Blend the projection with recent performance
+    solo_predicted_score = (updated_projection + player.average_points + player.last_week_points)/3
 
     # 5. Calculate opponent toughness
-    player_a_position = get_player_pos(player_a_projections)
-    player_b_position = get_player_pos(player_b_projections)
-    player_a_opponent_avg_points_allowed = get_player_opponent_stats(player_a_team_id,
-                                                                     week, player_a_position, player_a_recent_games)
-    player_b_opponent_avg_points_allowed = get_player_opponent_stats(player_b_team_id,
-                                                                     week, player_b_position, player_b_recent_games)
+    opponent_avg_points_allowed = get_player_opponent_stats(player.team_id, context.week, player.position,
+                                                            player.game_log, context.matchups, context.defense)
+    if opponent_avg_points_allowed is None:
+        return {'error': "Error: Could not retrieve opponent stats for one or both players."}
 
     # 6. Take Final Scores with opponent toughness
-    player_a_score = float(((player_a_solo_predicted_score * 7) + player_a_opponent_avg_points_allowed)/8)
-    player_b_score = float(((player_b_solo_predicted_score * 7) + player_b_opponent_avg_points_allowed)/8)
+    score = float(((solo_predicted_score * 7) + opponent_avg_points_allowed)/8)
+
+    return {
+        'id': player.player_id,
+        'name': player.name,
+        'position': player.position,
+        'team': player.team_id,
+        'projected_points': points,
+        'team_multiplier': team_multiplier,
+        'updated_projection': updated_projection,
+        'season_average': player.average_points,
+        'last_week': player.last_week_points,
+        'opponent_allowed': opponent_avg_points_allowed,
+        'score': score,
+        'spread': player.points_spread,
+    }
+
+
+def format_comparison(comparison):
+    """
+    Formats the result of compare_players as the start recommendation sentence.
+    """
+    if 'error' in comparison:
+        return comparison['error']
 
-    # 7. Compare and Return the Result
-    if player_a_score > player_b_score:
-        return (f"Start {player_a_name} with estimated fantasy points of {player_a_score:.2f} "
-                f"over {player_b_name} with estimated fantasy points of {player_b_score:.2f}")
+    if comparison['start'] == 'player_a':
+        start, sit = comparison['player_a'], comparison['player_b']
     else:
-        return (f"Start {player_b_name} with estimated fantasy points of {player_b_score:.2f} "
-                f"over {player_a_name} with estimated fantasy points of {player_a_score:.2f}")
+        start, sit = comparison['player_b'], comparison['player_a']
+    return (f"Start {start['name']} with estimated fantasy points of {start['score']:.2f} "
+            f"over {sit['name']} with estimated fantasy points of {sit['score']:.2f}")
 
 
 def get_player_id(player_name):
     """
-    Fetches the player ID for the given player name.
+    Fetches the player ID for the given player name using the shared player index.
     """
-    data = get_fantasy_point_projections(week='season')
-
-    if data and 'body' in data:
-        projections = data['body'].get('playerProjections', [])
-        for player in projections:
-            name = projections[player].get('longName')
-            if name.lower() == player_name.lower():
-                return player
+    index = get_player_index()
+    if index is None:
+        return None
+
+    player = index.lookup(player_name)
+    if player:
+        return player['id']
     return None
 
 
-def get_player_week_points(player_id):
+def get_player_week_points(player_id, data=None, scoring_profile=None):
     """
     Fetches the player avg points for the given playerID.
-    """
-    data = get_fantasy_point_projections(week='season')
-
-    if data and 'body' in data:
-        projections = data['body'].get('playerProjections', [])
-        for player in projections:
-            if player == player_id:
-                rush_fantasy_points = (float(projections[player]['Rushing'].get('rushYds'))/10 +
-                                       float(projections[player]['Rushing'].get('rushTD'))*6)
-                pass_fantasy_points = (float(projections[player]['Passing'].get('passYds'))*.04 +
-                                       float(projections[player]['Passing'].get('passTD'))*4 -
-                                       float(projections[player]['Passing'].get('int'))*2)
-                receiving_fantasy_points = (float(projections[player]['Receiving'].get('recTD'))*6 +
-                                            float(projections[player]['Receiving'].get('receptions')) +
-                                            float(projections[player]['Receiving'].get('recYds'))*.01)
-                fumble_fantasy_points = float(projections[player].get('fumblesLost'))*2
-                twopoint_fantasy_points = float(projections[player].get('twoPointConversion')) * 2
-                fantasy_points = (rush_fantasy_points + pass_fantasy_points + receiving_fantasy_points -
-                                  fumble_fantasy_points + twopoint_fantasy_points)
-                fantasy_points = fantasy_points/17
-                return fantasy_points
-    return None
 
+    Reads from the shared ProjectionEngine, which scores the whole league in one vectorized pass.
 
-def get_player_team_stats(player_team_id, teams_list):
-    """
-    Fetches the player team stats for the given player team ID.
+    :param player_id: The player ID.
+    :param data: An already fetched season projections response (optional).
+    :param scoring_profile: A profile name or dict from utils.scoring_profiles (optional).
     """
-    for team in teams_list['body']:
-        if team.get('teamAbv') == player_team_id:
-            team_wins = int(team.get('wins'))
-            team_losses = int(team.get('loss'))
-            if team['currentStreak'].get('result') == "W":
-                streak_factor = int(team['currentStreak'].get('length'))
+    engine = get_projection_engine(data)
+    if engine is None:
+        return None
+    return engine.points(player_id, scoring_profile)
 
-            else:
-                streak_factor = 1
-            if team_losses == 0 or team_wins == 0:
-                multiplier = team_wins * .01
-                multiplier = multiplier * (streak_factor / 2) + 1
-                return multiplier
-            elif team_losses == 1:
-                multiplier = (team_wins - 1) * .01
-                multiplier = multiplier * (streak_factor / 2) + 1
-                return multiplier
-            else:
-                multiplier = (team_wins/team_losses) * .01
-                multiplier = multiplier * (streak_factor / 2) + 1
-                return multiplier
 
-    return None
+def get_player_team_stats(player_team_id, teams=None):
+    """
+    Fetches the player team momentum multiplier for the given player team ID.
 
+    :param player_team_id: The team abbreviation.
+    :param teams: A TeamRepository (default: the shared repository).
+    """
+    if teams is None:
+        teams = get_team_repository()
+    if teams is None:
+        return None
+    return teams.multiplier(player_team_id)
 
-def get_player_opponent_stats(team_id, week, player_pos, recent_games):
-    weekly_matchups = get_nfl_games_for_week(week=week, season_type="reg", season="2024")
-    opponent = ''
-    for game in weekly_matchups['body']:
-        if game['home'] == team_id or game['away'] == team_id:
-            if game['home'] == team_id:
-                opponent = game['away']
-            else:
-                opponent = game['home']
-    schedules = get_nfl_teams(sort_by=opponent, rosters=False, schedules=False, top_performers=False,
-                              team_stats=True, team_stats_season=2024)
-    for team in schedules['body']:
-        if team['teamAbv'] == opponent:
-            if player_pos == 'QB':
-                team_pass_td_allowed = float(team['teamStats']['Defense']['passingTDAllowed'])
-                team_passing_yards_allowed = float(team['teamStats']['Defense']['passingYardsAllowed'])
-                team_defensive_interceptions = float(team['teamStats']['Defense']['defensiveInterceptions'])
-                season_position_points = float((team_passing_yards_allowed*.04) +
-                                               (team_pass_td_allowed*4) - (team_defensive_interceptions*2))
-                average_rushing_points = 0
-                for game in recent_games['body']:
-                    if 'Rushing' in recent_games['body'][game]:
-                        rushing_game_points = float(recent_games['body'][game]['Rushing'].get('rushYds'))
-                        average_rushing_points += rushing_game_points
-                average_rushing_points = float((average_rushing_points/(week - 1))*.1)
-                return (season_position_points / (week - 1)) + average_rushing_points
-
-            elif player_pos == 'WR':
-                team_pass_td_allowed = float(team['teamStats']['Defense']['passingTDAllowed'])
-                team_passing_yards_allowed = float(team['teamStats']['Defense']['passingYardsAllowed'])
-                season_position_points = float((team_passing_yards_allowed*.1) + (team_pass_td_allowed*6))
-                average_rushing_points = 0
-                average_throwing_points = 0
-                average_touchdown_points = 0
-                for game in recent_games['body']:
-                    if 'Rushing' in recent_games['body'][game]:
-                        rushing_game_points = float(recent_games['body'][game]['Rushing'].get('rushYds'))
-                        average_rushing_points += rushing_game_points
-                    if 'Passing' in recent_games['body'][game]:
-                        throwing_game_points = float(recent_games['body'][game]['Passing'].get('passYds'))
-                        touchdown_game_points = float(recent_games['body'][game]['Passing'].get('passTD'))
-                        average_throwing_points += throwing_game_points
-                        average_touchdown_points += touchdown_game_points
-                average_rushing_points = float((average_rushing_points / (week - 1)) * .1)
-                average_throwing_points = float((average_throwing_points / (week - 1)) * .04)
-                average_touchdown_points = float((average_touchdown_points / (week - 1)) * 4)
-                return ((season_position_points / (week - 1) / 2) + average_rushing_points +
-                        average_throwing_points + average_touchdown_points)
-
-            elif player_pos == 'RB':
-                team_rush_td_allowed = float(team['teamStats']['Defense']['rushingTDAllowed'])
-                team_rushing_yards_allowed = float(team['teamStats']['Defense']['rushingYardsAllowed'])
-                season_position_points = float((team_rushing_yards_allowed*.1) + (team_rush_td_allowed*6))
-                average_receiving_points = 0
-                average_throwing_points = 0
-                average_touchdown_points = 0
-                for game in recent_games['body']:
-                    if 'Receiving' in recent_games['body'][game]:
-                        receiving_yard_points = float(recent_games['body'][game]['Receiving'].get('recYds'))
-                        receiving_points = float(recent_games['body'][game]['Receiving'].get('receptions'))
-                        receiving_td = float(recent_games['body'][game]['Receiving'].get('recTD'))
-                        average_receiving_points = (average_receiving_points + (receiving_yard_points*.1) +
-                                                    receiving_points + (receiving_td * 6))
-                    else:
-                        average_receiving_points += 0
-                    if 'Passing' in recent_games['body'][game]:
-                        throwing_game_points = float(recent_games['body'][game]['Passing'].get('passYds'))
-                        touchdown_game_points = float(recent_games['body'][game]['Passing'].get('passTD'))
-                        average_throwing_points += throwing_game_points
-                        average_touchdown_points += touchdown_game_points
-                average_receiving_points = average_receiving_points / (week - 1)
-                average_throwing_points = float((average_throwing_points / (week - 1)) * .04)
-                average_touchdown_points = float((average_touchdown_points / (week - 1)) * 4)
-                return (season_position_points/(week-1) + average_receiving_points +
-                        average_touchdown_points + average_throwing_points)
-
-            elif player_pos == 'TE':
-                team_pass_td_allowed = float(team['teamStats']['Defense']['passingTDAllowed'])
-                team_passing_yards_allowed = float(team['teamStats']['Defense']['passingYardsAllowed'])
-                season_position_points = float((team_passing_yards_allowed * .1) + (team_pass_td_allowed * 6))
-                return season_position_points/(week-1) / 3
-            else:
-                return None
-    return None
+
+def get_player_opponent_stats(team_id, week, player_pos, game_log, matchups=None, defense=None):
+    """
+    Estimates the points a player's opponent allows to the player's position.
+
+    :param team_id: The player's team abbreviation.
+    :param week: Week for comparison.
+    :param player_pos: The player's position.
+    :param game_log: The player's GameLog or PlayerAggregate for the season so far.
+    :param matchups: The week's WeeklyMatchups (default: the shared table for the week).
+    :param defense: A DefenseAllowedTable (default: the shared table for the season).
+    """
+    if matchups is None:
+        matchups = get_weekly_matchups(week)
+    if defense is None:
+        defense = get_defense_allowed()
+    if matchups is None or defense is None:
+        return None
+
+    opponent = matchups.opponent(team_id)
+    season_position_points = defense.points_allowed(opponent, player_pos)
+    if season_position_points is None:
+        return None
+
+    if player_pos == 'QB':
+        average_rushing_points = game_log.stat_total('rushYds')
+        average_rushing_points = float((average_rushing_points/(week - 1))*.1)
+        return (season_position_points / (week - 1)) + average_rushing_points
+
+    elif player_pos == 'WR':
+        average_rushing_points = float((game_log.stat_total('rushYds') / (week - 1)) * .1)
+        average_throwing_points = float((game_log.stat_total('passYds') / (week - 1)) * .04)
+        average_touchdown_points = float((game_log.stat_total('passTD') / (week - 1)) * 4)
+        return ((season_position_points / (week - 1) / 2) + average_rushing_points +
+                average_throwing_points + average_touchdown_points)
+
+    elif player_pos == 'RB':
+        average_receiving_points = ((game_log.stat_total('recYds')*.1) + game_log.stat_total('receptions') +
+                                    (game_log.stat_total('recTD') * 6))
+        average_receiving_points = average_receiving_points / (week - 1)
+        average_throwing_points = float((game_log.stat_total('passYds') / (week - 1)) * .04)
+        average_touchdown_points = float((game_log.stat_total('passTD') / (week - 1)) * 4)
+        return (season_position_points/(week-1) + average_receiving_points +
+                average_touchdown_points + average_throwing_points)
+
+    elif player_pos == 'TE':
+        return season_position_points/(week-1) / 3
+    else:
+        return None
 
 
 def get_player_pos(player_projections):
@@ -257,31 +450,24 @@ def get_player_team(player_projections):
     return player_team_id
 
 
-def get_team_logo(team_name):
+def get_team_logo(team_name, teams=None):
     # Fetch the NFL teams data
-    data = get_nfl_teams()
+    if teams is None:
+        teams = get_team_repository()
 
-    if data is None:
+    if teams is None:
         print("Failed to retrieve team data.")
         return
 
-    # Loop through the teams and find the one matching the given team name
-    for team in data['body']:
-        if team['teamAbv'].lower() == team_name.lower():
-            logo_url = team['nflComLogo1']
-            return logo_url
-
-    print(f"Team '{team_name}' not found.")
-    return None
+    logo_url = teams.logo(team_name)
+    if logo_url is None:
+        print(f"Team '{team_name}' not found.")
+    return logo_url
 
 
 # Calculate average fantasy points for the last set of games
-def calculate_average_fantasy_points(games):
-    total_points = 0
-    for game in games['body']:
-        game_points = float(games['body'][game]['fantasyPointsDefault'].get('PPR'))
-        total_points += game_points
-    return total_points
+def calculate_average_fantasy_points(game_log, scoring_profile=None):
+    return game_log.total_points(scoring_profile)
 
 
 def get_player_stats(player_id):
@@ -290,10 +476,5 @@ def get_player_stats(player_id):
     return None
 
 
-def get_last_week_performance(games):
-    points = 0
-    if games['body']:
-        first_game_key = next(iter(games['body']))
-        first_game = games['body'][first_game_key]
-        points = float(first_game['fantasyPointsDefault'].get('PPR', 0))
-    return points
+def get_last_week_performance(game_log, scoring_profile=None):
+    return game_log.last_game_points(scoring_profile)
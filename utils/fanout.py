@@ -0,0 +1,67 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Upper bound on concurrent upstream fetches per process, keep it within the RapidAPI rate limit
+MAX_WORKERS = int(os.getenv("COMPARE_MAX_WORKERS", "8"))
+# Seconds a single comparison may spend waiting on upstream data
+REQUEST_DEADLINE = float(os.getenv("COMPARE_DEADLINE", "15"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='fanout')
+
+
+def new_deadline(seconds=REQUEST_DEADLINE):
+    """
+    Returns an absolute deadline that can be shared by every fetch stage of one request.
+    """
+    return time.monotonic() + seconds
+
+
+def start_concurrently(tasks):
+    """
+    Submits independent fetches to the shared bounded thread pool without waiting on them.
+
+    Tasks must not submit work to the pool themselves, only the request thread fans out.
+
+    :param tasks: Dict mapping a name to a zero-argument callable.
+    :return: Dict mapping each name to its Future, to be passed to gather().
+    """
+    return {name: _executor.submit(task) for name, task in tasks.items()}
+
+
+def gather(futures, deadline=None):
+    """
+    Waits for futures from start_concurrently() until the deadline.
+
+    :param futures: Dict mapping a name to a Future.
+    :param deadline: Absolute time.monotonic() deadline (default: REQUEST_DEADLINE from now).
+    :return: Dict mapping each name to its result, or None if it failed or missed the deadline.
+    """
+    if deadline is None:
+        deadline = new_deadline()
+
+    wait(futures.values(), timeout=max(deadline - time.monotonic(), 0))
+
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            print(f"Fetch '{name}' missed the request deadline.")
+            results[name] = None
+        elif future.exception() is not None:
+            print(f"Fetch '{name}' failed: {future.exception()}")
+            results[name] = None
+        else:
+            results[name] = future.result()
+    return results
+
+
+def run_concurrently(tasks, deadline=None):
+    """
+    Runs independent fetches concurrently and waits for all of them, see start_concurrently().
+
+    :param tasks: Dict mapping a name to a zero-argument callable.
+    :param deadline: Absolute time.monotonic() deadline (default: REQUEST_DEADLINE from now).
+    :return: Dict mapping each name to its result, or None if it failed or missed the deadline.
+    """
+    return gather(start_concurrently(tasks), deadline)
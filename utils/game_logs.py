@@ -0,0 +1,181 @@
+import argparse
+import os
+
+from utils.api_calls import get_nfl_box_score, get_nfl_games_for_week
+from utils.cache import ENDPOINT_TTLS
+from utils.matchups import MATCHUP_SEASON, current_week
+from utils.records import GameLog, GameRecord, PlayerAggregate, record_cache
+from utils.records import load_game_log as load_api_game_log
+from utils.snapshot_store import DEFAULT_STORE_PATH, SnapshotStore, offline_store
+
+COMPLETED = 'Completed'
+
+
+def ingest_week(store, season, week, force=False):
+    """
+    Adds every player's stat line from one week's completed games to the store's game logs.
+
+    One schedule call plus one box score call per game, however many players the week covers.
+    The games' final scores are saved too. A week is only marked as ingested once all of its
+    games are completed.
+
+    :param store: The SnapshotStore holding the game logs.
+    :param season: Season year.
+    :param week: Regular season week.
+    :param force: Ingest the week again even if it was already ingested.
+    :return: The number of player stat lines saved, or None if the week's schedule could not be fetched.
+    """
+    if not force and store.week_ingested(season, week):
+        return 0
+
+    games = get_nfl_games_for_week(week=week, season_type="reg", season=str(season))
+    if not games or 'body' not in games:
+        print(f"Failed to retrieve the schedule for week {week}.")
+        return None
+
+    lines = []
+    results = []
+    complete = True
+    for game in games['body']:
+        if game.get('gameStatus') != COMPLETED:
+            complete = False
+            continue
+        box_score = get_nfl_box_score(game['gameID'])
+        if not box_score or 'body' not in box_score:
+            print(f"Failed to retrieve the box score for {game['gameID']}.")
+            complete = False
+            continue
+        for player_id, line in (box_score['body'].get('playerStats') or {}).items():
+            lines.append((player_id, game['gameID'], line))
+        # Final scores let a backtest rebuild the team records as they stood before each week
+        home_points = box_score['body'].get('homePts')
+        away_points = box_score['body'].get('awayPts')
+        if home_points not in (None, '') and away_points not in (None, ''):
+            results.append((game['gameID'], game.get('home'), game.get('away'), home_points, away_points))
+
+    if lines:
+        store.save_game_lines(lines)
+        update_aggregates(store, lines)
+    if results:
+        store.save_game_results(season, week, results)
+    if complete:
+        store.mark_week_ingested(season, week)
+    return len(lines)
+
+
+def update_aggregates(store, lines):
+    """
+    Folds newly ingested stat lines into the players' running totals.
+
+    Games newer than a player's last counted game are added in O(1) each. A game ingested again or
+    out of order makes that player's totals be recounted from the whole stored log.
+
+    :param store: The SnapshotStore holding the game logs.
+    :param lines: Iterable of (player ID, game ID, stat line dict) just saved to the store.
+    """
+    by_player = {}
+    for player_id, game_id, line in lines:
+        by_player.setdefault(player_id, []).append((game_id, line))
+
+    stored = store.aggregates(by_player)
+    updated = {}
+    for player_id, games in by_player.items():
+        games.sort(key=lambda game: game[0])
+        data = stored.get(player_id)
+        aggregate = PlayerAggregate.from_dict(player_id, data) if data else PlayerAggregate(player_id)
+        if aggregate.last_game_id is not None and games[0][0] <= aggregate.last_game_id:
+            aggregate = PlayerAggregate(player_id)
+            games = sorted((store.player_games(player_id) or {'body': {}})['body'].items())
+        for game_id, line in games:
+            aggregate.add(GameRecord(game_id, line))
+        updated[player_id] = (aggregate.last_game_id, aggregate.to_dict())
+    store.save_aggregates(updated)
+
+
+def ingest_completed_weeks(store, season=MATCHUP_SEASON, weeks=None, force=False):
+    """
+    Ingests the box scores of every week not ingested yet.
+
+    :param store: The SnapshotStore holding the game logs.
+    :param season: Season year.
+    :param weeks: Weeks to ingest (default: week 1 through the week in progress).
+    :param force: Ingest weeks again even if they were already ingested.
+    :return: The number of player stat lines saved.
+    """
+    if offline_store is not None:
+        print("Unset API_OFFLINE_STORE before ingesting, the fetchers are serving from the store.")
+        return 0
+
+    weeks = weeks or range(1, current_week() + 1)
+    total = 0
+    for week in weeks:
+        count = ingest_week(store, season, week, force)
+        if count:
+            print(f"Ingested {count} player stat lines for week {week}")
+            total += count
+    return total
+
+
+def _open_game_log_store():
+    if offline_store is not None:
+        return offline_store
+    path = os.getenv("GAME_LOG_STORE")
+    return SnapshotStore(path) if path else None
+
+
+# When GAME_LOG_STORE points at a store with ingested box scores, player game logs are read from it
+# instead of being fetched per player. The offline store is used when it is enabled.
+game_log_store = _open_game_log_store()
+
+
+def game_log_version():
+    """
+    Returns when the game log store was last written, or None when game logs come from the API.
+    """
+    if game_log_store is None:
+        return None
+    return game_log_store.version('player_games')
+
+
+def load_game_log(player_id, number_of_games=None):
+    """
+    Loads a player's most recent games from the game log store, or from the API when it is not in use.
+
+    When the player has played no more games than requested, the stored running totals answer
+    for the whole log and no game is read or summed.
+
+    :param player_id: The player ID.
+    :param number_of_games: Limit the number of recent games (optional).
+    :return: A PlayerAggregate or GameLog, or None if the API fetch failed.
+    """
+    version = game_log_version()
+    if version is None:
+        return load_api_game_log(player_id, number_of_games)
+
+    # Keyed on the store version, so ingesting a new week invalidates the parsed logs
+    key = f"game_log_store:{version}:{player_id}:{number_of_games}"
+    record = record_cache.get(key)
+    if record is not None:
+        return record
+
+    data = game_log_store.aggregates([player_id]).get(player_id)
+    if data and (not number_of_games or data['games'] <= int(number_of_games)):
+        record = PlayerAggregate.from_dict(player_id, data)
+    else:
+        games = game_log_store.player_games(player_id, number_of_games) or {'body': {}}
+        record = GameLog(player_id, games['body'])
+    record_cache.set(key, record, ENDPOINT_TTLS['getNFLGamesForPlayer'])
+    return record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest completed weeks' box scores into the game log store.")
+    parser.add_argument('--store', default=os.getenv("GAME_LOG_STORE") or DEFAULT_STORE_PATH,
+                        help="Path of the SQLite store.")
+    parser.add_argument('--season', type=int, default=MATCHUP_SEASON, help="Season year to ingest.")
+    parser.add_argument('--weeks', type=int, nargs='*', help="Weeks to ingest (default: every week so far).")
+    parser.add_argument('--force', action='store_true', help="Ingest weeks again even if already ingested.")
+    args = parser.parse_args()
+
+    total = ingest_completed_weeks(SnapshotStore(args.store), args.season, args.weeks, args.force)
+    print(f"Ingested {total} player stat lines")
@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+
+import numpy as np
+
+from utils.comparison import ComparisonContext, score_player
+from utils.game_logs import game_log_store, game_log_version, load_game_log
+from utils.scoring_engine import get_projection_engine
+
+# Players per position included by default, the fantasy-relevant part of each depth chart
+HEAD_TO_HEAD_LIMIT = 100
+
+
+class HeadToHead:
+    """
+    Start-over matrix for a position group: every player scored once with the compare_players model,
+    then every pair compared at once by broadcasting the scores.
+    """
+
+    def __init__(self, position, week, scores, skipped=None):
+        """
+        :param position: The position abbreviation.
+        :param week: Week for comparison.
+        :param scores: List of score dicts from score_player.
+        :param skipped: List of dicts with the 'id', 'name' and 'error' of each player left out (optional).
+        """
+        self.position = position
+        self.week = week
+        self.skipped = skipped or []
+        self.players = sorted(scores, key=lambda score: score['score'], reverse=True)
+        self.scores = np.array([player['score'] for player in self.players], dtype=np.float64)
+        # margins[i, j] is how many points player i is expected to score over player j
+        self.margins = self.scores[:, np.newaxis] - self.scores[np.newaxis, :]
+
+    def __len__(self):
+        return len(self.players)
+
+    @property
+    def start_over(self):
+        """
+        Boolean matrix, True where the row player should be started over the column player.
+        """
+        return self.margins > 0
+
+    def iter_json(self):
+        """
+        Yields the matrix as a JSON document in chunks, one matrix row at a time.
+        """
+        players = [{key: player[key] for key in ('id', 'name', 'team', 'score')} for player in self.players]
+        yield (f'{{"position": {json.dumps(self.position)}, "week": {self.week}, '
+               f'"players": {json.dumps(players)}, "margins": [')
+        for row, margins in enumerate(np.round(self.margins, 2).tolist()):
+            yield ('' if row == 0 else ', ') + json.dumps(margins)
+        yield f'], "skipped": {json.dumps(self.skipped)}}}'
+
+    def iter_csv(self):
+        """
+        Yields the matrix as CSV, one line per player: its name and score, then its margin over each player.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['Player', 'Score'] + [player['name'] for player in self.players])
+        for player, margins in zip(self.players, np.round(self.margins, 2).tolist()):
+            writer.writerow([player['name'], round(player['score'], 2)] + margins)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+
+def head_to_head(position, week, limit=HEAD_TO_HEAD_LIMIT, scoring_profile=None, deadline=None):
+    """
+    Scores the top players at a position and builds their all-pairs start-over matrix.
+
+    Game logs are read from the ingested box scores of the game log store, never fetched per player,
+    so a matrix costs the shared league data at most. Players without ingested games are skipped.
+
+    :param position: The position abbreviation (e.g., 'WR').
+    :param week: Week for comparison.
+    :param limit: Number of players, taken by projected points (default: HEAD_TO_HEAD_LIMIT).
+    :param scoring_profile: A profile name or dict from utils.scoring_profiles (default: API PPR points).
+    :param deadline: Absolute time.monotonic() deadline for the upstream fetches (optional).
+    :return: A HeadToHead with the players left out under .skipped, or None if the data could not be
+             retrieved or no game log store is in use.
+    """
+    if game_log_version() is None:
+        print("Head-to-head needs the game log store, set GAME_LOG_STORE and ingest box scores first.")
+        return None
+
+    engine = get_projection_engine()
+    if engine is None:
+        print("Failed to retrieve season projections.")
+        return None
+
+    players = {player['id']: player['name'] for player in engine.rank_position(position, limit, scoring_profile)}
+    errors = {}
+    game_logs = {}
+    stored = game_log_store.aggregates(players)
+    for player_id in players:
+        if player_id in stored:
+            game_logs[player_id] = load_game_log(player_id, number_of_games=week-1)
+        else:
+            errors[player_id] = "Error: No ingested games."
+
+    context, load_errors = ComparisonContext.load_many({player_id: players[player_id] for player_id in game_logs},
+                                                       week, deadline=deadline, scoring_profile=scoring_profile,
+                                                       game_logs=game_logs)
+    if context.error:
+        print(context.error)
+        return None
+    errors.update(load_errors)
+
+    scores = []
+    for player_id, player in context.players.items():
+        score = score_player(player, context)
+        if 'error' in score:
+            errors[player_id] = score['error']
+        else:
+            scores.append(score)
+
+    skipped = [{'id': player_id, 'name': players[player_id], 'error': error} for player_id, error in errors.items()]
+    for player in skipped:
+        print(f"Skipping {player['name']}: {player['error']}")
+    return HeadToHead(position, week, scores, skipped)
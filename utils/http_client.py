@@ -0,0 +1,170 @@
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection and retry settings, overridable from the environment
+CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "10"))
+POOL_SIZE = int(os.getenv("API_POOL_SIZE", "20"))
+MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("API_RETRY_BACKOFF", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Longest Retry-After wait honoured before a retry, in seconds. Longer values are cut to it, so a
+# throttled upstream cannot hold a worker for minutes.
+MAX_RETRY_AFTER = float(os.getenv("API_MAX_RETRY_AFTER", "5"))
+# Client-side rate limit sized to the RapidAPI plan, requests per second (0 disables it)
+RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "10"))
+RATE_BURST = int(os.getenv("API_RATE_BURST", "10"))
+# Server worker processes sharing the plan's rate limit, each one gets its share. Gunicorn's
+# WEB_CONCURRENCY, its post_fork hook sets the actual count (see gunicorn.conf.py).
+RATE_LIMIT_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. acquire() blocks until a token is available, so calls over the
+    limit are queued instead of being sent and rejected with 429.
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        :param rate: Tokens added per second.
+        :param capacity: Maximum tokens held, i.e. the allowed burst.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def resize(self, rate, capacity):
+        """
+        Changes the rate and burst, keeping the tokens already held up to the new capacity.
+        """
+        with self._lock:
+            self.rate = rate
+            self.capacity = capacity
+            self._tokens = min(self._tokens, capacity)
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            # Reserve a token now, callers that overdraw sleep until their token has refilled
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class Tank01Retry(Retry):
+    """
+    Retry policy that takes a token from the client's rate limiter before every retry, so retries
+    count against the plan's rate limit like first attempts, and honours Retry-After up to
+    MAX_RETRY_AFTER seconds.
+    """
+
+    def __init__(self, *args, limiter=None, **kwargs):
+        """
+        :param limiter: The TokenBucket retries draw from (optional).
+        """
+        super().__init__(*args, **kwargs)
+        self.limiter = limiter
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.limiter = self.limiter
+        return retry
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, MAX_RETRY_AFTER)
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        if self.limiter is not None:
+            self.limiter.acquire()
+
+
+class Tank01Client:
+    """
+    Shared HTTP client for the Tank01 RapidAPI endpoints.
+
+    Owns one pooled requests.Session with keep-alive connections, the RapidAPI headers,
+    connect/read timeouts, jittered exponential backoff retries for 429 and 5XX responses and a
+    token bucket that queues calls beyond the plan's rate limit. Every attempt, retries included,
+    takes a token, and the limit is split between the worker processes sharing the plan.
+    """
+
+    def __init__(self, host, api_key, pool_size=POOL_SIZE, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 max_retries=MAX_RETRIES, backoff_factor=RETRY_BACKOFF, rate_limit=RATE_LIMIT, rate_burst=RATE_BURST,
+                 workers=RATE_LIMIT_WORKERS):
+        """
+        :param host: The RapidAPI host name.
+        :param api_key: The RapidAPI key.
+        :param pool_size: Maximum number of kept-alive connections to the host.
+        :param timeout: (connect, read) timeout in seconds applied to every request.
+        :param max_retries: Retries for connection errors and retryable status codes.
+        :param backoff_factor: Base delay in seconds for exponential backoff between retries.
+        :param rate_limit: Requests per second allowed upstream, excess calls wait (0 disables it).
+        :param rate_burst: Requests allowed in a burst above the rate.
+        :param workers: Processes sharing rate_limit and rate_burst, this client takes its share.
+        """
+        self.timeout = timeout
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.limiter = TokenBucket(*self._share(workers)) if rate_limit > 0 else None
+
+        retry = Tank01Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+            limiter=self.limiter,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['x-rapidapi-host'] = host
+        if api_key:
+            self.session.headers['x-rapidapi-key'] = api_key
+
+    def _share(self, workers):
+        workers = max(1, workers)
+        return self.rate_limit / workers, max(1, self.rate_burst // workers)
+
+    def share_rate_limit(self, workers):
+        """
+        Resizes this process's token bucket to its share of the plan's rate limit.
+
+        :param workers: Number of processes sharing the plan.
+        """
+        if self.limiter is not None:
+            self.limiter.resize(*self._share(workers))
+
+    def get(self, url, params=None):
+        """
+        Performs a GET request over the pooled session.
+
+        :param url: The endpoint URL.
+        :param params: Query parameters for the request.
+        :return: The requests.Response object.
+        """
+        if self.limiter is not None:
+            self.limiter.acquire()
+        return self.session.get(url, params=params, timeout=self.timeout)
+
+    def close(self):
+        self.session.close()
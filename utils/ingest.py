@@ -0,0 +1,70 @@
+import argparse
+
+from utils.api_calls import get_fantasy_point_projections, get_nfl_games_for_week, get_nfl_player_headshot
+from utils.game_logs import ingest_completed_weeks
+from utils.snapshot_store import DEFAULT_STORE_PATH, SnapshotStore, offline_store
+from utils.teams import fetch_teams
+
+# Positions whose headshots are ingested by default
+GAME_LOG_POSITIONS = ('QB', 'RB', 'WR', 'TE', 'PK')
+
+
+def ingest(store, season=2024, weeks=range(1, 19), game_log_positions=GAME_LOG_POSITIONS, headshots=False):
+    """
+    Pulls projections, teams, weekly schedules and player game logs (from box scores) into a store.
+
+    :param store: The SnapshotStore to fill.
+    :param season: Season year for schedules and game logs.
+    :param weeks: Regular season weeks whose schedules and box scores are ingested.
+    :param game_log_positions: Positions whose players' headshots are ingested.
+    :param headshots: Whether to also ingest headshots (one extra call per player).
+    """
+    if offline_store is not None:
+        print("Unset API_OFFLINE_STORE before ingesting, the fetchers are serving from the store.")
+        return
+
+    data = get_fantasy_point_projections(week='season')
+    if not data or 'body' not in data:
+        print("Failed to retrieve season projections.")
+        return
+    projections = data['body'].get('playerProjections', {})
+    store.save_projections(projections)
+    print(f"Ingested {len(projections)} player projections")
+
+    teams = fetch_teams()
+    if teams and 'body' in teams:
+        store.save_teams(teams['body'])
+        print(f"Ingested {len(teams['body'])} teams")
+
+    for week in weeks:
+        games = get_nfl_games_for_week(week=week, season_type="reg", season=str(season))
+        if games and 'body' in games:
+            store.save_weekly_games(season, week, games['body'])
+    print(f"Ingested schedules for weeks {min(weeks)}-{max(weeks)}")
+
+    # Game logs are built from each completed week's box scores, not fetched per player
+    ingest_completed_weeks(store, season, weeks)
+
+    if headshots:
+        players = [player_id for player_id, projection in projections.items()
+                   if projection.get('pos') in game_log_positions]
+        for count, player_id in enumerate(players, start=1):
+            headshot = get_nfl_player_headshot(projections[player_id].get('longName'))
+            if headshot:
+                store.save_headshot(player_id, *headshot)
+            if count % 100 == 0:
+                print(f"Ingested headshots for {count}/{len(players)} players")
+        print(f"Ingested headshots for {len(players)} players")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest Tank01 data into a local snapshot store.")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help="Path of the SQLite store.")
+    parser.add_argument('--season', type=int, default=2024, help="Season year to ingest.")
+    parser.add_argument('--weeks', type=int, default=18, help="Ingest schedules for weeks 1 through WEEKS.")
+    parser.add_argument('--positions', nargs='*', default=list(GAME_LOG_POSITIONS),
+                        help="Positions whose headshots are ingested.")
+    parser.add_argument('--headshots', action='store_true', help="Also ingest player headshots.")
+    args = parser.parse_args()
+
+    ingest(SnapshotStore(args.store), args.season, range(1, args.weeks + 1), tuple(args.positions), args.headshots)
@@ -1,6 +1,11 @@
+import argparse
 import csv
 import os
+from contextlib import ExitStack
+
 from utils.api_calls import get_fantasy_point_projections
+from utils.columnar_export import write_game_log_columns, write_projection_columns
+from utils.snapshot_store import SnapshotStore
 
 # CSV file path
 CSV_FILE_WR = 'nfl_fantasy_projections_wr.csv'
@@ -9,29 +14,74 @@ CSV_FILE_RB = 'nfl_fantasy_projections_rb.csv'
 CSV_FILE_QB = 'nfl_fantasy_projections_qb.csv'
 CSV_FILE_PK = 'nfl_fantasy_projections_pk.csv'
 
-# Create the CSV file and define its columns
-def create_csv(file_path, pos):
-    # Define the column headers (adjust as per the API response structure)
-    headers = []
-    if pos == 'WR':
-        headers = ['Player Name', 'Projected Season Rush Yards', 'Projected Season Rush TDs',
-                   'Projected Season Receptions', 'Projected Season Yards', 'Projected Season TDs']
+# Columns shared by the skill positions: (header, projection section or None, stat key)
+_SKILL_COLUMNS = [
+    ('Player Name', None, 'longName'),
+    ('Projected Season Rush Yards', 'Rushing', 'rushYds'),
+    ('Projected Season Rush TDs', 'Rushing', 'rushTD'),
+    ('Projected Season Receptions', 'Receiving', 'receptions'),
+    ('Projected Season Yards', 'Receiving', 'recYds'),
+    ('Projected Season TDs', 'Receiving', 'recTD'),
+]
 
-    elif pos == 'RB':
-        headers = ['Player Name', 'Projected Season Rush Yards', 'Projected Season Rush TDs',
-                   'Projected Season Receptions', 'Projected Season Yards', 'Projected Season TDs']
+# Export schema per CSV: the file it goes to, the projection positions routed to it and its columns
+CSV_SCHEMAS = {
+    'WR': {
+        'file': CSV_FILE_WR,
+        'positions': ('WR',),
+        'columns': _SKILL_COLUMNS,
+    },
+    'RB': {
+        'file': CSV_FILE_RB,
+        'positions': ('RB', 'FB'),
+        'columns': _SKILL_COLUMNS,
+    },
+    'TE': {
+        'file': CSV_FILE_TE,
+        'positions': ('TE',),
+        'columns': _SKILL_COLUMNS,
+    },
+    'QB': {
+        'file': CSV_FILE_QB,
+        'positions': ('QB',),
+        'columns': [
+            ('Player Name', None, 'longName'),
+            ('Projected Season Rushing Yards', 'Rushing', 'rushYds'),
+            ('Projected Season Rushing TDs', 'Rushing', 'rushTD'),
+            ('Projected Season Passing TDs', 'Passing', 'passTD'),
+            ('Projected Season Passing Yards', 'Passing', 'passYds'),
+            ('Projected Season INTs', 'Passing', 'int'),
+        ],
+    },
+    'PK': {
+        'file': CSV_FILE_PK,
+        'positions': ('PK',),
+        'columns': [
+            ('Player Name', None, 'longName'),
+            ('Projected Season Made FGs', 'Kicking', 'fgMade'),
+            ('Projected Season Missed FGs', 'Kicking', 'fgMissed'),
+            ('Projected Season Made XPs', 'Kicking', 'xpMade'),
+            ('Projected Season Missed XPs', 'Kicking', 'xpMissed'),
+        ],
+    },
+}
 
-    elif pos == 'QB':
-        headers = ['Player Name', 'Projected Season Rushing Yards', 'Projected Season Rushing TDs',
-                   'Projected Season Passing TDs', 'Projected Season Passing Yards', 'Projected Season INTs']
 
-    elif pos == 'TE':
-        headers = ['Player Name', 'Projected Season Rush Yards', 'Projected Season Rush TDs',
-                   'Projected Season Receptions', 'Projected Season Yards', 'Projected Season TDs']
+def _headers(pos):
+    return [header for header, _, _ in CSV_SCHEMAS[pos]['columns']]
 
-    elif pos == 'PK':
-        headers = ['Player Name', 'Projected Season Made FGs', 'Projected Season Missed FGs',
-                   'Projected Season Made XPs', 'Projected Season Missed XPs']
+
+def _row(projection, columns):
+    row = []
+    for _, section, stat in columns:
+        source = (projection.get(section) or {}) if section else projection
+        row.append(source.get(stat))
+    return row
+
+
+# Create the CSV file and define its columns
+def create_csv(file_path, pos):
+    headers = _headers(pos) if pos in CSV_SCHEMAS else []
 
     with open(file_path, mode='w', newline='') as file:
         writer = csv.writer(file)
@@ -39,72 +89,96 @@ def create_csv(file_path, pos):
         print(f"CSV file '{file_path}' created with headers: {headers}")
 
 
-# Add a single row of data to the CSV from the API response
+def write_projections(projections, files, mode='w'):
+    """
+    Routes every player to its position's CSV in a single streaming pass.
+
+    :param projections: The 'playerProjections' dict from a season projections response.
+    :param files: Dict mapping an export position (key of CSV_SCHEMAS) to its output path.
+    :param mode: 'w' to write fresh files with headers, 'a' to append rows to existing files.
+    :return: Dict mapping each export position to the number of rows written.
+    """
+    with ExitStack() as stack:
+        writers = {}
+        routes = {}
+        counts = {}
+        for pos, file_path in files.items():
+            # One buffered handle per file for the whole export
+            file = stack.enter_context(open(file_path, mode=mode, newline='', buffering=1 << 16))
+            writers[pos] = csv.writer(file)
+            if mode == 'w':
+                writers[pos].writerow(_headers(pos))
+            counts[pos] = 0
+            for player_pos in CSV_SCHEMAS[pos]['positions']:
+                routes[player_pos] = pos
+
+        for projection in projections.values():
+            pos = routes.get(projection.get('pos'))
+            if pos is None:
+                continue
+            writers[pos].writerow(_row(projection, CSV_SCHEMAS[pos]['columns']))
+            counts[pos] += 1
+
+    return counts
+
+
+def export_projections(positions=None, directory='.', files=None, columnar_directory=None, game_log_store=None):
+    """
+    Fetches the season projections once and writes one CSV per position.
+
+    :param positions: Export positions to write (default: every key of CSV_SCHEMAS).
+    :param directory: Directory for the default file names.
+    :param files: Dict mapping export positions to explicit output paths (overrides positions/directory).
+    :param columnar_directory: Also write a typed columnar snapshot of all players there (optional).
+    :param game_log_store: Path of a SnapshotStore with ingested box scores, whose game logs are added
+                           to the columnar snapshot (optional).
+    :return: Dict mapping each export position to the number of rows written, or None if the fetch failed.
+    """
+    if files is None:
+        positions = positions or list(CSV_SCHEMAS)
+        files = {pos: os.path.join(directory, CSV_SCHEMAS[pos]['file']) for pos in positions}
+
+    data = get_fantasy_point_projections(week='season')
+    if not data or 'body' not in data:
+        print("Failed to retrieve season projections.")
+        return None
+
+    projections = data['body'].get('playerProjections', {})
+    counts = write_projections(projections, files)
+    for pos, count in counts.items():
+        print(f"Wrote {count} {pos} rows to '{files[pos]}'")
+
+    if columnar_directory:
+        count = write_projection_columns(projections, columnar_directory)
+        print(f"Wrote {count} players to columnar snapshot '{columnar_directory}'")
+        if game_log_store:
+            store = SnapshotStore(game_log_store)
+            game_logs = {player_id: store.player_games(player_id) for player_id in projections}
+            count = write_game_log_columns(game_logs, columnar_directory)
+            print(f"Wrote {count} games to columnar snapshot '{columnar_directory}'")
+    return counts
+
+
+# Add the position's rows to an existing CSV from the API response
 def add_data_to_csv(file_path, pos):
-    # Fetch data from the API
     data = get_fantasy_point_projections(week='season')
     if data and 'body' in data:
-        projections = data['body'].get('playerProjections', [])
-        for player in projections:
-            if pos == 'WR' and projections[player].get('pos') == 'WR':
-                player_name = projections[player].get('longName')
-                season_rush_prediction = projections[player]['Rushing'].get('rushYds')
-                season_rush_td_prediction = projections[player]['Rushing'].get('rushTD')
-                season_rec_prediction = projections[player]['Receiving'].get('receptions')
-                season_yard_prediction = projections[player]['Receiving'].get('recYds')
-                season_red_td_prediction = projections[player]['Receiving'].get('recTD')
-                with open(file_path, mode='a', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow([player_name, season_rush_prediction, season_rush_td_prediction,
-                                     season_rec_prediction, season_yard_prediction, season_red_td_prediction])
-
-            elif pos == 'RB' and (projections[player].get('pos') == 'RB' or projections[player].get('pos') == 'FB'):
-                player_name = projections[player].get('longName')
-                season_rush_prediction = projections[player]['Rushing'].get('rushYds')
-                season_rush_td_prediction = projections[player]['Rushing'].get('rushTD')
-                season_rec_prediction = projections[player]['Receiving'].get('receptions')
-                season_yard_prediction = projections[player]['Receiving'].get('recYds')
-                season_red_td_prediction = projections[player]['Receiving'].get('recTD')
-                with open(file_path, mode='a', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow([player_name, season_rush_prediction, season_rush_td_prediction,
-                                     season_rec_prediction, season_yard_prediction, season_red_td_prediction])
-
-            elif pos == 'TE' and projections[player].get('pos') == 'TE':
-                player_name = projections[player].get('longName')
-                season_rush_prediction = projections[player]['Rushing'].get('rushYds')
-                season_rush_td_prediction = projections[player]['Rushing'].get('rushTD')
-                season_rec_prediction = projections[player]['Receiving'].get('receptions')
-                season_yard_prediction = projections[player]['Receiving'].get('recYds')
-                season_red_td_prediction = projections[player]['Receiving'].get('recTD')
-                with open(file_path, mode='a', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow([player_name, season_rush_prediction, season_rush_td_prediction,
-                                     season_rec_prediction, season_yard_prediction, season_red_td_prediction])
-            elif pos == 'PK' and projections[player].get('pos') == 'PK':
-                print(projections[player])
-                player_name = projections[player].get('longName')
-                season_fg_made_prediction = projections[player]['Kicking'].get('fgMade')
-                season_fg_missed_prediction = projections[player]['Kicking'].get('fgMissed')
-                season_xp_made_prediction = projections[player]['Kicking'].get('xpMade')
-                season_xp_missed_prediction = projections[player]['Kicking'].get('xpMissed')
-                with open(file_path, mode='a', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow([player_name, season_fg_made_prediction, season_fg_missed_prediction,
-                                     season_xp_made_prediction, season_xp_missed_prediction])
-            elif pos == 'QB' and projections[player].get('pos') == 'QB':
-                player_name = projections[player].get('longName')
-                season_rush_prediction = projections[player]['Rushing'].get('rushYds')
-                season_rush_td_prediction = projections[player]['Rushing'].get('rushTD')
-                season_pass_td_prediction = projections[player]['Passing'].get('passTD')
-                season_pass_yards_prediction = projections[player]['Passing'].get('passYds')
-                season_int_prediction = projections[player]['Passing'].get('int')
-                with open(file_path, mode='a', newline='') as file:
-                    writer = csv.writer(file)
-                    writer.writerow([player_name, season_rush_prediction, season_rush_td_prediction,
-                                     season_pass_td_prediction, season_pass_yards_prediction, season_int_prediction])
+        write_projections(data['body'].get('playerProjections', {}), {pos: file_path}, mode='a')
     return None
 
 
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export season projections to one CSV per position.")
+    parser.add_argument('positions', nargs='*',
+                        help=f"Positions to export: {', '.join(CSV_SCHEMAS)} (default: all).")
+    parser.add_argument('--directory', default='.', help="Output directory for the CSV files.")
+    parser.add_argument('--columnar', help="Also write a columnar snapshot (.npy columns) to this directory.")
+    parser.add_argument('--game-log-store', default=os.getenv("GAME_LOG_STORE"),
+                        help="SQLite store with ingested box scores, adds game logs to the columnar snapshot.")
+    args = parser.parse_args()
+    for position in args.positions:
+        if position not in CSV_SCHEMAS:
+            parser.error(f"unknown position '{position}'")
 
-
+    export_projections(args.positions or None, args.directory, columnar_directory=args.columnar,
+                       game_log_store=args.game_log_store)
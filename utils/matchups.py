@@ -0,0 +1,134 @@
+import os
+from datetime import date
+
+import numpy as np
+
+from utils.api_calls import get_nfl_games_for_week
+from utils.cache import derived_from
+from utils.teams import fetch_teams
+
+DEFENSE_POSITIONS = ['QB', 'RB', 'WR', 'TE']
+# Defensive team stats the points allowed are derived from
+DEFENSE_STATS = ('passingYardsAllowed', 'passingTDAllowed', 'defensiveInterceptions', 'rushingYardsAllowed',
+                 'rushingTDAllowed')
+
+# Season the weekly schedules are read from
+MATCHUP_SEASON = 2024
+# Tuesday before the season opener, NFL weeks roll over on Tuesdays
+SEASON_WEEK_ONE = date(2024, 9, 3)
+REGULAR_SEASON_WEEKS = 18
+
+
+def current_week(today=None):
+    """
+    Returns the regular season week in progress, clamped to 1-18. CURRENT_WEEK overrides it.
+
+    :param today: The date to compute the week for (default: today).
+    """
+    override = os.getenv("CURRENT_WEEK")
+    if override:
+        return int(override)
+    today = today or date.today()
+    week = (today - SEASON_WEEK_ONE).days // 7 + 1
+    return min(max(week, 1), REGULAR_SEASON_WEEKS)
+
+
+class WeeklyMatchups:
+    """
+    Team -> opponent table for one week's games.
+    """
+
+    def __init__(self, games):
+        """
+        :param games: The 'body' list from a getNFLGamesForWeek response.
+        """
+        self.opponents = {}
+        for game in games:
+            self.opponents[game['home']] = game['away']
+            self.opponents[game['away']] = game['home']
+
+    def opponent(self, team_id):
+        """
+        Returns the opponent's team abbreviation for the week, or None on a bye.
+        """
+        return self.opponents.get(team_id)
+
+
+class DefenseAllowedTable:
+    """
+    Team x position matrix of season fantasy points allowed, derived from defensive team stats.
+    """
+
+    def __init__(self, teams):
+        """
+        :param teams: The 'body' list from a getNFLTeams response requested with team stats.
+        """
+        self._build({team['teamAbv']: team['teamStats']['Defense'] for team in teams})
+
+    @classmethod
+    def from_totals(cls, totals):
+        """
+        Builds the table from defensive totals summed elsewhere, e.g. from box scores up to a week.
+
+        :param totals: Dict mapping each team abbreviation to a dict of the DEFENSE_STATS it allowed.
+        """
+        table = cls.__new__(cls)
+        table._build(totals)
+        return table
+
+    def _build(self, totals):
+        self.teams = list(totals)
+        self.rows = {team_id: row for row, team_id in enumerate(self.teams)}
+        self.columns = {position: column for column, position in enumerate(DEFENSE_POSITIONS)}
+
+        def defense_column(stat):
+            return np.array([float(totals[team_id][stat]) for team_id in self.teams], dtype=np.float64)
+
+        passing_yards_allowed = defense_column('passingYardsAllowed')
+        pass_td_allowed = defense_column('passingTDAllowed')
+        defensive_interceptions = defense_column('defensiveInterceptions')
+        rushing_yards_allowed = defense_column('rushingYardsAllowed')
+        rush_td_allowed = defense_column('rushingTDAllowed')
+
+        self.allowed = np.empty((len(self.teams), len(DEFENSE_POSITIONS)), dtype=np.float64)
+        self.allowed[:, self.columns['QB']] = ((passing_yards_allowed*.04) + (pass_td_allowed*4) -
+                                               (defensive_interceptions*2))
+        self.allowed[:, self.columns['RB']] = (rushing_yards_allowed*.1) + (rush_td_allowed*6)
+        self.allowed[:, self.columns['WR']] = (passing_yards_allowed*.1) + (pass_td_allowed*6)
+        self.allowed[:, self.columns['TE']] = (passing_yards_allowed*.1) + (pass_td_allowed*6)
+
+    def points_allowed(self, team_id, position):
+        """
+        Returns the season fantasy points a defense allowed to a position, or None if unknown.
+        """
+        row = self.rows.get(team_id)
+        column = self.columns.get(position)
+        if row is None or column is None:
+            return None
+        return float(self.allowed[row, column])
+
+
+_matchups = derived_from(lambda week, season: get_nfl_games_for_week(week=week, season_type="reg",
+                                                                     season=str(season)),
+                         WeeklyMatchups)
+_defense = derived_from(fetch_teams, DefenseAllowedTable)
+
+
+def get_weekly_matchups(week, season=MATCHUP_SEASON, data=None):
+    """
+    Returns the shared WeeklyMatchups for a week, rebuilt only when the cached schedule changes.
+
+    :param week: The NFL week number.
+    :param season: The season year.
+    :param data: An already fetched getNFLGamesForWeek response (optional).
+    """
+    return _matchups(int(week), int(season), data=data)
+
+
+def get_defense_allowed(data=None):
+    """
+    Returns the shared DefenseAllowedTable, rebuilt only when the cached team stats change.
+
+    :param data: An already fetched response from utils.teams.fetch_teams() (optional).
+    """
+    return _defense(data=data)
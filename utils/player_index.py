@@ -0,0 +1,287 @@
+import difflib
+import math
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+
+from utils.cache import LEAGUE_SNAPSHOT_DIR
+from utils.columnar import PLAYER_INDEX_DIR, ColumnarTable, derived_from_published
+from utils.scoring_engine import get_projection_engine
+
+# Common first-name short forms, used to index each player under both spellings.
+NICKNAMES = {
+    'alex': 'alexander',
+    'ben': 'benjamin',
+    'cam': 'cameron',
+    'chris': 'christopher',
+    'dan': 'daniel',
+    'danny': 'daniel',
+    'dave': 'david',
+    'gabe': 'gabriel',
+    'jake': 'jacob',
+    'joe': 'joseph',
+    'josh': 'joshua',
+    'matt': 'matthew',
+    'mike': 'michael',
+    'nick': 'nicholas',
+    'pat': 'patrick',
+    'rob': 'robert',
+    'sam': 'samuel',
+    'tom': 'thomas',
+    'tony': 'anthony',
+    'will': 'william',
+    'zach': 'zachary',
+}
+_FULL_NAMES = {}
+for _short, _full in NICKNAMES.items():
+    _FULL_NAMES.setdefault(_full, []).append(_short)
+
+_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+# Similarity a fuzzy match needs. A difflib ratio this high also requires the shorter name to be at
+# least FUZZY_LENGTH_RATIO of the longer one, so only names of a compatible length are compared.
+FUZZY_CUTOFF = 0.75
+FUZZY_LENGTH_RATIO = FUZZY_CUTOFF / (2 - FUZZY_CUTOFF)
+
+
+def normalize_name(name):
+    """
+    Normalizes a player name for lookups: accent-folded, lowercase, punctuation and suffixes removed.
+
+    :param name: A free-text player name (e.g., "Ja'Marr Chase Jr.").
+    :return: The normalized name (e.g., 'jamarr chase').
+    """
+    folded = unicodedata.normalize('NFKD', name or '')
+    folded = ''.join(char for char in folded if not unicodedata.combining(char)).lower()
+    folded = re.sub(r"[.'`’]", '', folded)
+    words = [word for word in re.split(r'[^a-z0-9]+', folded) if word]
+    if len(words) > 1 and words[-1] in _SUFFIXES:
+        words = words[:-1]
+    return ' '.join(words)
+
+
+def name_variants(name):
+    """
+    Returns every normalized spelling a player should be found under, including nickname swaps.
+    """
+    normalized = normalize_name(name)
+    variants = {normalized}
+    if not normalized:
+        return variants
+    first, _, rest = normalized.partition(' ')
+    alternatives = list(_FULL_NAMES.get(first, []))
+    if first in NICKNAMES:
+        alternatives.append(NICKNAMES[first])
+    for alternative in alternatives:
+        variants.add(f"{alternative} {rest}".strip())
+    return variants
+
+
+class PlayerIndex:
+    """
+    Name index over the season projections with binary-searched lookups and prefix search.
+
+    Every structure is a sorted NumPy array, so an index can be published as a columnar snapshot
+    (see utils.columnar_export) and opened memory-mapped by every worker on a host.
+    """
+
+    def __init__(self, projections):
+        """
+        :param projections: The 'playerProjections' dict from a season projections response.
+        """
+        players = []
+        names = set()
+        search_keys = set()
+        for player_id, projection in projections.items():
+            long_name = projection.get('longName')
+            if not long_name:
+                continue
+            row = len(players)
+            players.append((player_id, long_name, projection.get('pos') or '', projection.get('team') or ''))
+
+            for variant in name_variants(long_name):
+                names.add((variant, row))
+                # Index the full name and every trailing word run so "chase" finds "Ja'Marr Chase"
+                words = variant.split(' ')
+                for start in range(len(words)):
+                    search_keys.add((' '.join(words[start:]), player_id, row))
+
+        ids, long_names, positions, teams = zip(*players) if players else ((), (), (), ())
+        self.ids = np.array(ids, dtype=str)
+        self.names = np.array(long_names, dtype=str)
+        self.positions = np.array(positions, dtype=str)
+        self.teams = np.array(teams, dtype=str)
+
+        # Exact names, first player of a name first
+        names = sorted(names)
+        self.name_keys = np.array([key for key, _ in names], dtype=str)
+        self.name_rows = np.array([row for _, row in names], dtype=np.int64)
+
+        # Prefix search keys, ordered by key then player ID
+        search_keys = sorted(search_keys)
+        self.search_keys = np.array([key for key, _, _ in search_keys], dtype=str)
+        self.search_rows = np.array([row for _, _, row in search_keys], dtype=np.int64)
+
+        # Distinct keys with their first letter and length, so a fuzzy miss compares only names
+        # starting with the same letter and of a compatible length
+        fuzzy_keys = sorted({key for key, _, _ in search_keys})
+        self.fuzzy_keys = np.array(fuzzy_keys, dtype=str)
+        self.fuzzy_initials = np.array([key[:1] for key in fuzzy_keys], dtype='U1')
+        self.fuzzy_lengths = np.array([len(key) for key in fuzzy_keys], dtype=np.int64)
+        self._prepare()
+
+    @classmethod
+    def from_engine(cls, engine):
+        """
+        Builds the index over the players of a ProjectionEngine.
+        """
+        return cls({str(player_id): {'longName': str(name), 'pos': str(position), 'team': str(team)}
+                    for player_id, name, position, team in zip(engine.ids, engine.names, engine.positions,
+                                                               engine.teams)})
+
+    @classmethod
+    def from_tables(cls, directory):
+        """
+        Opens an index over the tables written by utils.columnar_export.write_player_index_columns.
+        """
+        tables = {name: ColumnarTable(os.path.join(directory, name))
+                  for name in ('players', 'names', 'search', 'fuzzy')}
+        index = cls.__new__(cls)
+        index.ids = tables['players']['id']
+        index.names = tables['players']['name']
+        index.positions = tables['players']['pos']
+        index.teams = tables['players']['team']
+        index.name_keys = tables['names']['key']
+        index.name_rows = tables['names']['row']
+        index.search_keys = tables['search']['key']
+        index.search_rows = tables['search']['row']
+        index.fuzzy_keys = tables['fuzzy']['key']
+        index.fuzzy_initials = tables['fuzzy']['initial']
+        index.fuzzy_lengths = tables['fuzzy']['length']
+        index._prepare()
+        return index
+
+    def _prepare(self):
+        self._id_order = np.argsort(self.ids, kind='stable')
+
+    def tables(self):
+        """
+        Returns the index as columnar tables, a dict mapping table names to their columns.
+        """
+        return {
+            'players': {'id': self.ids, 'name': self.names, 'pos': self.positions, 'team': self.teams},
+            'names': {'key': self.name_keys, 'row': self.name_rows},
+            'search': {'key': self.search_keys, 'row': self.search_rows},
+            'fuzzy': {'key': self.fuzzy_keys, 'initial': self.fuzzy_initials, 'length': self.fuzzy_lengths},
+        }
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _player(self, row):
+        return {
+            'id': str(self.ids[row]),
+            'name': str(self.names[row]),
+            'pos': str(self.positions[row]) or None,
+            'team': str(self.teams[row]) or None,
+        }
+
+    def _search_rows(self, key):
+        start = int(np.searchsorted(self.search_keys, key, side='left'))
+        end = int(np.searchsorted(self.search_keys, key, side='right'))
+        return self.search_rows[start:end]
+
+    def _fuzzy_candidates(self, name):
+        shortest = math.ceil(len(name) * FUZZY_LENGTH_RATIO)
+        longest = math.floor(len(name) / FUZZY_LENGTH_RATIO)
+        mask = ((self.fuzzy_initials == name[0]) & (self.fuzzy_lengths >= shortest) &
+                (self.fuzzy_lengths <= longest))
+        return [str(key) for key in self.fuzzy_keys[mask]]
+
+    def lookup(self, name):
+        """
+        Returns the player dict for an exact (normalized) name match, or None.
+        """
+        name = normalize_name(name)
+        position = int(np.searchsorted(self.name_keys, name, side='left'))
+        if position < len(self.name_keys) and self.name_keys[position] == name:
+            return self._player(self.name_rows[position])
+        return None
+
+    def get(self, player_id):
+        player_id = str(player_id)
+        position = int(np.searchsorted(self.ids, player_id, sorter=self._id_order))
+        if position < len(self.ids):
+            row = self._id_order[position]
+            if self.ids[row] == player_id:
+                return self._player(row)
+        return None
+
+    def search(self, query, limit=10):
+        """
+        Prefix search over full names and last names, falling back to fuzzy matching.
+
+        :param query: The partial name typed by the user.
+        :param limit: Maximum number of players to return.
+        :return: A list of player dicts ordered by name.
+        """
+        prefix = normalize_name(query)
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        position = int(np.searchsorted(self.search_keys, prefix, side='left'))
+        while position < len(self.search_keys) and len(results) < limit:
+            if not str(self.search_keys[position]).startswith(prefix):
+                break
+            row = int(self.search_rows[position])
+            if row not in seen:
+                seen.add(row)
+                results.append(self._player(row))
+            position += 1
+
+        if not results:
+            candidates = self._fuzzy_candidates(prefix)
+            for name in difflib.get_close_matches(prefix, candidates, n=limit, cutoff=FUZZY_CUTOFF):
+                for row in self._search_rows(name):
+                    row = int(row)
+                    if row not in seen:
+                        seen.add(row)
+                        results.append(self._player(row))
+
+        return sorted(results[:limit], key=lambda player: player['name'])
+
+
+# The index over the projection engine, rebuilt whenever the engine is, as (engine, index)
+_engine_index = [None]
+_engine_index_lock = threading.Lock()
+# With a shared cache the index is opened over the snapshot the cache warmer publishes
+_published_index = derived_from_published(os.path.join(LEAGUE_SNAPSHOT_DIR, PLAYER_INDEX_DIR),
+                                          PlayerIndex.from_tables) if LEAGUE_SNAPSHOT_DIR else None
+
+
+def get_player_index():
+    """
+    Returns the shared PlayerIndex: the published snapshot's when there is one, otherwise built
+    over the shared ProjectionEngine and rebuilt whenever it changes.
+    """
+    if _published_index is not None:
+        index = _published_index()
+        if index is not None:
+            # Drop the index built before the first snapshot was published
+            _engine_index[0] = None
+            return index
+
+    engine = get_projection_engine()
+    if engine is None:
+        return None
+    with _engine_index_lock:
+        entry = _engine_index[0]
+        if entry is None or entry[0] is not engine:
+            entry = (engine, PlayerIndex.from_engine(engine))
+            _engine_index[0] = entry
+        return entry[1]
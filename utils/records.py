@@ -0,0 +1,292 @@
+import os
+import time
+
+from utils.api_calls import get_fantasy_point_projections, get_nfl_games_for_player
+from utils.cache import DEFAULT_TTL, ENDPOINT_TTLS, LOCAL_CACHE_ENTRIES, SHARED_CACHE, TTLCache, response_cache
+from utils.scoring_profiles import STAT_FIELDS, get_scoring_profile, stat_value
+
+# Position of each stat key in GameRecord.stats
+STAT_INDEX = {stat: column for column, (_, _, stat) in enumerate(STAT_FIELDS)}
+# Weight of the newest game in a player's exponentially weighted average of PPR points
+EWMA_ALPHA = float(os.getenv("GAME_EWMA_ALPHA", "0.3"))
+
+
+class PlayerRecord:
+    """
+    The fields of a player's projection the comparison uses.
+    """
+    __slots__ = ('player_id', 'name', 'position', 'team')
+
+    def __init__(self, projection):
+        """
+        :param projection: The 'body' of a getNFLProjections response requested for one player.
+        """
+        self.player_id = projection.get('playerID')
+        self.name = projection.get('longName')
+        self.position = projection['pos']
+        self.team = str(projection.get('team'))
+
+    @classmethod
+    def from_values(cls, player_id, name, position, team):
+        """
+        Rebuilds a PlayerRecord from already extracted values, e.g. a ProjectionEngine row.
+        """
+        record = cls.__new__(cls)
+        record.player_id = player_id
+        record.name = name
+        record.position = position
+        record.team = team
+        return record
+
+
+class GameRecord:
+    """
+    One game from a player's game log, with every stat in STAT_FIELDS converted to float once.
+    """
+    __slots__ = ('game_id', 'ppr_points', 'stats')
+
+    def __init__(self, game_id, game):
+        """
+        :param game_id: The Tank01 game ID.
+        :param game: The game dict from a getNFLGamesForPlayer response.
+        """
+        self.game_id = game_id
+        self.ppr_points = float((game.get('fantasyPointsDefault') or {}).get('PPR', 0))
+        self.stats = tuple(stat_value(game, section, stat) for _, section, stat in STAT_FIELDS)
+
+    @classmethod
+    def from_values(cls, game_id, ppr_points, stats):
+        """
+        Rebuilds a GameRecord from already converted values, e.g. a stored PlayerAggregate.
+        """
+        record = cls.__new__(cls)
+        record.game_id = game_id
+        record.ppr_points = ppr_points
+        record.stats = tuple(stats)
+        return record
+
+    def stat(self, stat):
+        """
+        Returns one stat by its upstream key (e.g. 'rushYds'), 0.0 when the game did not record it.
+        """
+        return self.stats[STAT_INDEX[stat]]
+
+    def points(self, scoring_profile=None):
+        """
+        Scores the game. Without a scoring profile the API's precomputed PPR points are used,
+        otherwise the stat line is scored locally so one game log serves every league format.
+        """
+        if scoring_profile is None:
+            return self.ppr_points
+        profile = get_scoring_profile(scoring_profile)
+        points = 0.0
+        for column, (key, _, _) in enumerate(STAT_FIELDS):
+            weight = profile.get(key, 0)
+            if weight:
+                points += weight * self.stats[column]
+        return points
+
+
+class GameLog:
+    """
+    A player's game log as GameRecords, in response order (most recent game first).
+    """
+    __slots__ = ('player_id', 'games')
+
+    def __init__(self, player_id, games):
+        """
+        :param player_id: The player ID.
+        :param games: The 'body' dict of a getNFLGamesForPlayer response.
+        """
+        self.player_id = player_id
+        self.games = tuple(GameRecord(game_id, game) for game_id, game in games.items())
+
+    @classmethod
+    def from_records(cls, player_id, games):
+        """
+        Builds a GameLog from already parsed GameRecords, most recent game first.
+        """
+        log = cls(player_id, {})
+        log.games = tuple(games)
+        return log
+
+    def __len__(self):
+        return len(self.games)
+
+    def __iter__(self):
+        return iter(self.games)
+
+    def total_points(self, scoring_profile=None):
+        total_points = 0
+        for game in self.games:
+            total_points += game.points(scoring_profile)
+        return total_points
+
+    def last_game_points(self, scoring_profile=None):
+        if not self.games:
+            return 0
+        return self.games[0].points(scoring_profile)
+
+    def stat_total(self, stat):
+        column = STAT_INDEX[stat]
+        total = 0.0
+        for game in self.games:
+            total += game.stats[column]
+        return total
+
+    def points_spread(self, scoring_profile=None):
+        """
+        Returns the sample standard deviation of the points per game, or None with fewer than two games.
+        """
+        if len(self.games) < 2:
+            return None
+        points = [game.points(scoring_profile) for game in self.games]
+        mean = sum(points) / len(points)
+        return (sum((value - mean) ** 2 for value in points) / (len(points) - 1)) ** 0.5
+
+
+class PlayerAggregate:
+    """
+    Running totals of a player's games, updated in O(1) as each new game is ingested.
+
+    Answers the same questions as a GameLog of all the player's games (total_points,
+    last_game_points, stat_total) without keeping or re-summing the games.
+    """
+    __slots__ = ('player_id', 'games', 'stat_sums', 'ppr_sum', 'ppr_square_sum', 'ewma_ppr', 'last_game_id',
+                 'last_game')
+
+    def __init__(self, player_id, games=0, stat_sums=None, ppr_sum=0.0, ewma_ppr=None, last_game=None,
+                 ppr_square_sum=0.0):
+        self.player_id = player_id
+        self.games = games
+        self.stat_sums = list(stat_sums) if stat_sums is not None else [0.0] * len(STAT_FIELDS)
+        self.ppr_sum = ppr_sum
+        # None for aggregates stored before it was tracked, their spread is unknown until recounted
+        self.ppr_square_sum = ppr_square_sum
+        self.ewma_ppr = ewma_ppr
+        self.last_game = last_game
+        self.last_game_id = last_game.game_id if last_game is not None else None
+
+    def __len__(self):
+        return self.games
+
+    def add(self, game):
+        """
+        Adds a GameRecord played after every game already counted.
+        """
+        self.games += 1
+        for column, value in enumerate(game.stats):
+            self.stat_sums[column] += value
+        self.ppr_sum += game.ppr_points
+        if self.ppr_square_sum is not None:
+            self.ppr_square_sum += game.ppr_points ** 2
+        if self.ewma_ppr is None:
+            self.ewma_ppr = game.ppr_points
+        else:
+            self.ewma_ppr = EWMA_ALPHA * game.ppr_points + (1 - EWMA_ALPHA) * self.ewma_ppr
+        self.last_game = game
+        self.last_game_id = game.game_id
+
+    def total_points(self, scoring_profile=None):
+        if scoring_profile is None:
+            return self.ppr_sum
+        profile = get_scoring_profile(scoring_profile)
+        points = 0.0
+        for column, (key, _, _) in enumerate(STAT_FIELDS):
+            weight = profile.get(key, 0)
+            if weight:
+                points += weight * self.stat_sums[column]
+        return points
+
+    def last_game_points(self, scoring_profile=None):
+        if self.last_game is None:
+            return 0
+        return self.last_game.points(scoring_profile)
+
+    def stat_total(self, stat):
+        return self.stat_sums[STAT_INDEX[stat]]
+
+    def points_spread(self, scoring_profile=None):
+        """
+        Returns the sample standard deviation of the PPR points per game, or None with fewer than two games.
+
+        Only PPR points are squared as games are added, so for another scoring profile the PPR spread
+        is scaled by the ratio of the player's total points under both.
+        """
+        if self.games < 2 or self.ppr_square_sum is None:
+            return None
+        variance = (self.ppr_square_sum - self.ppr_sum ** 2 / self.games) / (self.games - 1)
+        spread = max(variance, 0.0) ** 0.5
+        if scoring_profile is None:
+            return spread
+        if self.ppr_sum <= 0:
+            return None
+        return spread * self.total_points(scoring_profile) / self.ppr_sum
+
+    def to_dict(self):
+        last_game = self.last_game
+        return {
+            'games': self.games,
+            'stat_sums': self.stat_sums,
+            'ppr_sum': self.ppr_sum,
+            'ppr_square_sum': self.ppr_square_sum,
+            'ewma_ppr': self.ewma_ppr,
+            'last_game': None if last_game is None else [last_game.game_id, last_game.ppr_points,
+                                                          list(last_game.stats)],
+        }
+
+    @classmethod
+    def from_dict(cls, player_id, data):
+        last_game = None
+        if data.get('last_game'):
+            game_id, ppr_points, stats = data['last_game']
+            last_game = GameRecord.from_values(game_id, ppr_points, stats)
+        return cls(player_id, data['games'], data['stat_sums'], data['ppr_sum'], data['ewma_ppr'], last_game,
+                   data.get('ppr_square_sum'))
+
+
+# Parsed records keyed like the raw responses they came from and kept for the same TTL
+record_cache = TTLCache(max_entries=int(os.getenv("RECORD_CACHE_MAX_ENTRIES",
+                                                  str(LOCAL_CACHE_ENTRIES) if SHARED_CACHE else "1024")))
+
+
+def _load_record(endpoint, fetcher, parse, *args, **kwargs):
+    # The parsed record is the cached value, versioned on the expiry of the response it was parsed
+    # from. The response itself is released from memory, response_cache keeps only its expiry, which
+    # comparison ETags and memos are versioned on. Once the response expires or is refreshed, the
+    # fetcher runs again.
+    key = fetcher.cache_key(*args, **kwargs)
+    expires_at = response_cache.expires_at(key)
+    if expires_at is not None and expires_at > time.time():
+        entry = record_cache.get(key)
+        if entry is not None and entry[0] == expires_at:
+            return entry[1]
+
+    data = fetcher(*args, **kwargs)
+    if not data or 'body' not in data:
+        return None
+    record = parse(data['body'])
+    record_cache.set(key, (response_cache.expires_at(key), record), ENDPOINT_TTLS.get(endpoint, DEFAULT_TTL))
+    response_cache.release(key)
+    return record
+
+
+def load_player(player_id):
+    """
+    Fetches a player's projection and parses it into a PlayerRecord.
+
+    :return: The PlayerRecord, or None if the fetch failed.
+    """
+    return _load_record('getNFLProjections', get_fantasy_point_projections, PlayerRecord, player_id=player_id)
+
+
+def load_game_log(player_id, number_of_games=None):
+    """
+    Fetches a player's recent games and parses them into a GameLog.
+
+    :param player_id: The player ID.
+    :param number_of_games: Limit the number of recent games returned (optional).
+    :return: The GameLog, or None if the fetch failed.
+    """
+    return _load_record('getNFLGamesForPlayer', get_nfl_games_for_player,
+                        lambda games: GameLog(player_id, games), player_id, number_of_games=number_of_games)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from urllib.parse import parse_qsl, urlsplit
+
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from utils.cache import make_cache_key
+from utils.http_client import POOL_SIZE
+
+
+def request_key(url):
+    """
+    Builds the fixture key of a request: the Tank01 endpoint plus its normalized query parameters.
+    """
+    parts = urlsplit(url)
+    endpoint = parts.path.rstrip('/').rsplit('/', 1)[-1]
+    return endpoint, make_cache_key(endpoint, dict(parse_qsl(parts.query)))
+
+
+def _fixture_path(directory, key):
+    return os.path.join(directory, f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.json")
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Transport adapter that performs real requests and saves every response as a fixture.
+    """
+
+    def __init__(self, directory, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        endpoint, key = request_key(request.url)
+        fixture = {
+            'key': key,
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'body': response.content.decode('utf-8', errors='replace'),
+        }
+        with open(_fixture_path(self.directory, key), 'w') as file:
+            json.dump(fixture, file)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport adapter that answers requests from recorded fixtures, with injected latency.
+
+    Every request is counted per endpoint, so benchmarks can report upstream calls per comparison.
+    Requests without a fixture get a 404 response.
+    """
+
+    def __init__(self, directory, latency=0.0):
+        """
+        :param directory: Directory of fixtures written by RecordingAdapter.
+        :param latency: Seconds to sleep before answering each request.
+        """
+        super().__init__()
+        self.directory = directory
+        self.latency = latency
+        self.calls = Counter()
+        self.misses = Counter()
+        self._fixtures = {}
+        self._lock = threading.Lock()
+
+    def _fixture(self, key):
+        with self._lock:
+            if key not in self._fixtures:
+                try:
+                    with open(_fixture_path(self.directory, key)) as file:
+                        self._fixtures[key] = json.load(file)
+                except OSError:
+                    self._fixtures[key] = None
+            return self._fixtures[key]
+
+    def send(self, request, **kwargs):
+        endpoint, key = request_key(request.url)
+        with self._lock:
+            self.calls[endpoint] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        fixture = self._fixture(key)
+        response = Response()
+        response.url = request.url
+        response.request = request
+        response.headers = CaseInsensitiveDict({'Content-Type': 'application/json'})
+        if fixture is None:
+            with self._lock:
+                self.misses[endpoint] += 1
+            response.status_code = 404
+            response._content = json.dumps({'error': f"No fixture for {key}"}).encode('utf-8')
+        else:
+            response.status_code = fixture['status']
+            response._content = fixture['body'].encode('utf-8')
+        return response
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls.clear()
+            self.misses.clear()
+
+    def close(self):
+        pass
+
+
+def install_transport(client):
+    """
+    Mounts a recording or replaying transport on a Tank01Client based on the environment.
+
+    API_RECORD_DIR records every real response as a fixture. API_REPLAY_DIR serves fixtures
+    instead of the network, sleeping API_REPLAY_LATENCY seconds per request.
+
+    :return: The mounted adapter, or None when neither is configured.
+    """
+    replay_dir = os.getenv("API_REPLAY_DIR")
+    record_dir = os.getenv("API_RECORD_DIR")
+    if replay_dir:
+        adapter = ReplayAdapter(replay_dir, float(os.getenv("API_REPLAY_LATENCY", "0")))
+    elif record_dir:
+        adapter = RecordingAdapter(record_dir, pool_connections=1, pool_maxsize=POOL_SIZE,
+                                   max_retries=client.session.get_adapter('https://').max_retries)
+    else:
+        return None
+    client.session.mount('https://', adapter)
+    return adapter
@@ -0,0 +1,163 @@
+from utils.comparison import ComparisonContext, score_player
+
+# Default lineup: slot name -> number of starters
+LINEUP_SLOTS = {'QB': 1, 'RB': 2, 'WR': 2, 'TE': 1, 'FLEX': 1}
+
+# Positions eligible for each slot
+SLOT_POSITIONS = {
+    'QB': ('QB',),
+    'RB': ('RB',),
+    'WR': ('WR',),
+    'TE': ('TE',),
+    'FLEX': ('RB', 'WR', 'TE'),
+    'SUPERFLEX': ('QB', 'RB', 'WR', 'TE'),
+}
+
+
+def _max_weight_assignment(weights):
+    """
+    Assigns each row to a distinct column maximising the total weight (Hungarian algorithm).
+
+    :param weights: List of rows, each a list of weights with None for forbidden pairs. There may be
+                    fewer columns than rows.
+    :return: List with the column of each row, or None where the row could not be assigned.
+    """
+    rows = len(weights)
+    if not rows:
+        return []
+    # Forbidden and padding pairs cost more than any lineup could score, so they only fill
+    # rows nothing else can and never displace a real assignment
+    forbidden = 1.0 + sum(abs(weight) for row in weights for weight in row if weight is not None)
+    columns = max(rows, len(weights[0]))
+    cost = [[forbidden] * (columns + 1) for _ in range(rows + 1)]
+    for row, row_weights in enumerate(weights, 1):
+        for column, weight in enumerate(row_weights, 1):
+            if weight is not None:
+                cost[row][column] = -weight
+
+    # Potentials and matching over 1-based indices, column 0 is the search root
+    row_potential = [0.0] * (rows + 1)
+    column_potential = [0.0] * (columns + 1)
+    matched_row = [0] * (columns + 1)
+    previous = [0] * (columns + 1)
+    for row in range(1, rows + 1):
+        matched_row[0] = row
+        column = 0
+        slack = [float('inf')] * (columns + 1)
+        visited = [False] * (columns + 1)
+        while matched_row[column]:
+            visited[column] = True
+            current = matched_row[column]
+            delta = float('inf')
+            closest = 0
+            for other in range(1, columns + 1):
+                if visited[other]:
+                    continue
+                reduced = cost[current][other] - row_potential[current] - column_potential[other]
+                if reduced < slack[other]:
+                    slack[other] = reduced
+                    previous[other] = column
+                if slack[other] < delta:
+                    delta = slack[other]
+                    closest = other
+            for other in range(columns + 1):
+                if visited[other]:
+                    row_potential[matched_row[other]] += delta
+                    column_potential[other] -= delta
+                else:
+                    slack[other] -= delta
+            column = closest
+        # Flip the augmenting path back to the root
+        while column:
+            matched_row[column] = matched_row[previous[column]]
+            column = previous[column]
+
+    assignment = [None] * rows
+    for column in range(1, columns + 1):
+        row = matched_row[column]
+        if row and cost[row][column] < forbidden:
+            assignment[row - 1] = column - 1
+    return assignment
+
+
+def optimal_lineup(scores, slots=None):
+    """
+    Picks the starters with the highest total score over all lineup slots.
+
+    Every starter seat is matched to a distinct eligible player as one assignment problem, so
+    overlapping slots (flex spots, candidate lists sharing players) are filled optimally instead
+    of slot by slot. Seats are left empty only when no eligible player is left for them.
+
+    :param scores: List of score dicts from score_player.
+    :param slots: Dict mapping a slot name to either a number of starters (eligibility from
+                  SLOT_POSITIONS) or an explicit list of candidate player IDs for one starter.
+                  Default: LINEUP_SLOTS.
+    :return: Tuple of (dict mapping each slot to its starters' IDs, list of benched IDs), best first.
+    """
+    slots = slots or LINEUP_SLOTS
+    ranked = sorted(scores, key=lambda score: score['score'], reverse=True)
+
+    seats = []
+    weights = []
+    for slot, spec in slots.items():
+        if isinstance(spec, list):
+            candidates = set(spec)
+            eligible = [score['id'] in candidates for score in ranked]
+            count = 1
+        else:
+            positions = SLOT_POSITIONS.get(slot, (slot,))
+            eligible = [score['position'] in positions for score in ranked]
+            count = spec
+        for _ in range(count):
+            seats.append(slot)
+            weights.append([score['score'] if allowed else None for score, allowed in zip(ranked, eligible)])
+
+    lineup = {slot: [] for slot in slots}
+    used = set()
+    for slot, column in zip(seats, _max_weight_assignment(weights)):
+        if column is not None:
+            used.add(column)
+            lineup[slot].append(column)
+
+    lineup = {slot: [ranked[column]['id'] for column in sorted(columns)] for slot, columns in lineup.items()}
+    bench = [score['id'] for column, score in enumerate(ranked) if column not in used]
+    return lineup, bench
+
+
+def rank_roster(players, week, slots=None, scoring_profile=None, deadline=None):
+    """
+    Scores a whole roster with the compare_players model and picks the optimal starting lineup.
+
+    The league-wide data is fetched once for the batch and every player is scored once, instead
+    of comparing the roster pair by pair.
+
+    :param players: Dict mapping each player ID to its name.
+    :param week: Week for comparison.
+    :param slots: Lineup slots, see optimal_lineup (default: LINEUP_SLOTS).
+    :param scoring_profile: A profile name or dict from utils.scoring_profiles (default: API PPR points).
+    :param deadline: Absolute time.monotonic() deadline for the upstream fetches (optional).
+    :return: A dict with every scored player under 'players' (best first), the starters per slot under
+             'lineup', the rest under 'bench' and per-player failures under 'errors', or a dict with
+             an 'error' message if the shared data could not be retrieved.
+    """
+    context, errors = ComparisonContext.load_many(players, week, deadline=deadline,
+                                                  scoring_profile=scoring_profile)
+    if context.error:
+        return {'error': context.error}
+
+    scores = []
+    for player_id, player in context.players.items():
+        score = score_player(player, context)
+        if 'error' in score:
+            errors[player_id] = score['error']
+        else:
+            scores.append(score)
+
+    lineup, bench = optimal_lineup(scores, slots)
+    return {
+        'week': week,
+        'players': sorted(scores, key=lambda score: score['score'], reverse=True),
+        'lineup': lineup,
+        'bench': bench,
+        'errors': errors,
+    }
@@ -0,0 +1,195 @@
+import os
+
+import numpy as np
+
+from utils.api_calls import get_fantasy_point_projections
+from utils.cache import LEAGUE_SNAPSHOT_DIR, derived_from
+from utils.columnar import PROJECTIONS_DIR, ColumnarTable, derived_from_published
+from utils.records import PlayerRecord
+from utils.scoring_profiles import STAT_FIELDS, get_scoring_profile, profile_key, stat_value
+
+GAMES_PER_SEASON = 17
+# Scoring profiles whose points an engine keeps, requests may send any number of custom ones
+PROFILE_CACHE_ENTRIES = 16
+
+
+class ProjectionEngine:
+    """
+    League-wide season projections held as NumPy column arrays.
+
+    Projected weekly points (season projection spread over a 17 game season) for every player
+    are computed in one vectorized pass at load time. An engine can also be opened over a published
+    projections snapshot (see utils.columnar_export), whose memory-mapped columns every worker shares.
+    """
+
+    def __init__(self, projections):
+        """
+        :param projections: The 'playerProjections' dict from a season projections response.
+        """
+        self.ids = np.array(list(projections), dtype=str)
+        self.names = np.array([projection.get('longName') or '' for projection in projections.values()], dtype=str)
+        self.positions = np.array([projection.get('pos') or '' for projection in projections.values()], dtype=str)
+        self.teams = np.array([projection.get('team') or '' for projection in projections.values()], dtype=str)
+
+        # Raw stat columns, keyed by the scoring profile keys
+        self.stat_columns = {}
+        for key, section, stat in STAT_FIELDS:
+            self.stat_columns[key] = np.fromiter(
+                (stat_value(projection, section, stat) for projection in projections.values()),
+                dtype=np.float64, count=len(self.ids))
+
+        self.weekly_points = self._score(self.stat_columns)
+        self._prepare()
+
+    @classmethod
+    def from_table(cls, table):
+        """
+        Opens an engine over a ColumnarTable written by utils.columnar_export.write_projection_columns.
+        """
+        engine = cls.__new__(cls)
+        engine.ids = table['id']
+        engine.names = table['name']
+        engine.positions = table['pos']
+        engine.teams = table['team']
+        engine.stat_columns = {key: table[stat] for key, _, stat in STAT_FIELDS}
+        engine.weekly_points = table['weekly_points']
+        engine._prepare()
+        return engine
+
+    def _prepare(self):
+        # Rows by ID through a sorted permutation rather than a dict of every player
+        self._id_order = np.argsort(self.ids, kind='stable')
+        self._profile_points = {}
+        self._position_order = {}
+
+    @staticmethod
+    def _score(columns):
+        rush_fantasy_points = columns['rush_yards']/10 + columns['rush_td']*6
+        pass_fantasy_points = columns['pass_yards']*.04 + columns['pass_td']*4 - columns['pass_interceptions']*2
+        receiving_fantasy_points = (columns['receiving_td']*6 + columns['points_per_reception'] +
+                                    columns['receiving_yards']*.01)
+        fumble_fantasy_points = columns['fumbles']*2
+        twopoint_fantasy_points = columns['two_point_conversions'] * 2
+        fantasy_points = (rush_fantasy_points + pass_fantasy_points + receiving_fantasy_points -
+                          fumble_fantasy_points + twopoint_fantasy_points)
+        return fantasy_points/GAMES_PER_SEASON
+
+    def __len__(self):
+        return len(self.ids)
+
+    def points_array(self, scoring_profile=None):
+        """
+        Returns projected weekly points for every row, scored with a profile or the default formula.
+
+        :param scoring_profile: A profile name or dict from utils.scoring_profiles (optional).
+        """
+        key = profile_key(scoring_profile)
+        if key is None:
+            return self.weekly_points
+
+        points = self._profile_points.get(key)
+        if points is None:
+            profile = get_scoring_profile(scoring_profile)
+            points = np.zeros(len(self.ids), dtype=np.float64)
+            for stat_key, weight in profile.items():
+                if weight:
+                    points += weight * self.stat_columns[stat_key]
+            points /= GAMES_PER_SEASON
+            self._remember(self._profile_points, key, points)
+        return points
+
+    @staticmethod
+    def _remember(cache, key, value):
+        # Drop the oldest entries first, dicts keep insertion order
+        for oldest in list(cache)[:len(cache) - PROFILE_CACHE_ENTRIES + 1]:
+            cache.pop(oldest, None)
+        cache[key] = value
+
+    def row(self, player_id):
+        """
+        Returns the row of a player ID, or None if unknown.
+        """
+        player_id = str(player_id)
+        position = int(np.searchsorted(self.ids, player_id, sorter=self._id_order))
+        if position < len(self.ids):
+            row = int(self._id_order[position])
+            if self.ids[row] == player_id:
+                return row
+        return None
+
+    def player(self, player_id):
+        """
+        Returns the PlayerRecord of a player ID, or None if unknown.
+        """
+        row = self.row(player_id)
+        if row is None:
+            return None
+        return PlayerRecord.from_values(str(self.ids[row]), str(self.names[row]) or None, str(self.positions[row]),
+                                        str(self.teams[row] or None))
+
+    def points(self, player_id, scoring_profile=None):
+        """
+        Returns the projected weekly fantasy points for a player ID, or None if unknown.
+        """
+        row = self.row(player_id)
+        if row is None:
+            return None
+        return float(self.points_array(scoring_profile)[row])
+
+    def position_rows(self, position, scoring_profile=None):
+        """
+        Returns the row indices of players at a position, best projection first.
+        """
+        cache_key = (position, profile_key(scoring_profile))
+        order = self._position_order.get(cache_key)
+        if order is None:
+            points = self.points_array(scoring_profile)
+            rows = np.flatnonzero(self.positions == position)
+            order = rows[np.argsort(-points[rows], kind='stable')]
+            self._remember(self._position_order, cache_key, order)
+        return order
+
+    def rank_position(self, position, limit=None, scoring_profile=None):
+        """
+        Ranks every player at a position by projected weekly points.
+
+        :param position: The position abbreviation (e.g., 'WR').
+        :param limit: Maximum number of players to return (optional).
+        :param scoring_profile: A profile name or dict from utils.scoring_profiles (optional).
+        :return: A list of dicts with id, name, team and points, best first.
+        """
+        points = self.points_array(scoring_profile)
+        rows = self.position_rows(position, scoring_profile)
+        if limit is not None:
+            rows = rows[:limit]
+        return [{
+            'id': str(self.ids[row]),
+            'name': str(self.names[row]),
+            'team': str(self.teams[row]),
+            'points': float(points[row]),
+        } for row in rows]
+
+
+_engine = derived_from(lambda: get_fantasy_point_projections(week='season'),
+                       lambda body: ProjectionEngine(body.get('playerProjections', {})),
+                       cache_key=lambda: get_fantasy_point_projections.cache_key(week='season'))
+# With a shared cache the engine is opened over the snapshot the cache warmer publishes
+_published_engine = derived_from_published(
+    os.path.join(LEAGUE_SNAPSHOT_DIR, PROJECTIONS_DIR),
+    lambda directory: ProjectionEngine.from_table(ColumnarTable(directory))) if LEAGUE_SNAPSHOT_DIR else None
+
+
+def get_projection_engine(data=None):
+    """
+    Returns the shared ProjectionEngine: the published snapshot's when there is one, otherwise
+    built from the season projections and rebuilt whenever they change.
+
+    :param data: An already fetched season projections response (optional).
+    """
+    if _published_engine is not None:
+        engine = _published_engine()
+        if engine is not None:
+            # Drop the engine built from the response before the first snapshot was published
+            _engine.clear()
+            return engine
+    return _engine(data=data)
@@ -0,0 +1,129 @@
+# League scoring profiles map the scoring keywords of get_nfl_games_for_player (pass_yards, rush_td, ...)
+# to points per unit. They are applied locally to raw stat lines, so one upstream game log fetch
+# serves every league format. Without a profile the model keeps its original scoring: Tank01's own
+# fantasy points for games and the ProjectionEngine formula for projections, which no profile matches.
+
+# (profile key, stat line section or None for top-level fields, stat key)
+STAT_FIELDS = [
+    ('pass_yards', 'Passing', 'passYds'),
+    ('pass_td', 'Passing', 'passTD'),
+    ('pass_interceptions', 'Passing', 'int'),
+    ('carries', 'Rushing', 'carries'),
+    ('rush_yards', 'Rushing', 'rushYds'),
+    ('rush_td', 'Rushing', 'rushTD'),
+    ('points_per_reception', 'Receiving', 'receptions'),
+    ('receiving_yards', 'Receiving', 'recYds'),
+    ('receiving_td', 'Receiving', 'recTD'),
+    ('targets', 'Receiving', 'targets'),
+    ('fumbles', None, 'fumblesLost'),
+    ('two_point_conversions', None, 'twoPointConversion'),
+    ('def_td', 'Defense', 'defTD'),
+    ('xp_made', 'Kicking', 'xpMade'),
+    ('xp_missed', 'Kicking', 'xpMissed'),
+    ('fg_made', 'Kicking', 'fgMade'),
+    ('fg_missed', 'Kicking', 'fgMissed'),
+]
+
+STANDARD = {
+    'pass_yards': 0.04,
+    'pass_td': 4,
+    'pass_interceptions': -2,
+    'carries': 0,
+    'rush_yards': 0.1,
+    'rush_td': 6,
+    'points_per_reception': 0,
+    'receiving_yards': 0.1,
+    'receiving_td': 6,
+    'targets': 0,
+    'fumbles': -2,
+    'two_point_conversions': 2,
+    'def_td': 6,
+    'xp_made': 1,
+    'xp_missed': -1,
+    'fg_made': 3,
+    'fg_missed': -1,
+}
+
+SCORING_PROFILES = {
+    'standard': STANDARD,
+    'half_ppr': {**STANDARD, 'points_per_reception': 0.5},
+    'ppr': {**STANDARD, 'points_per_reception': 1},
+}
+
+
+def make_scoring_profile(base='ppr', **overrides):
+    """
+    Builds a custom scoring profile from a named base profile.
+
+    :param base: Name of the profile to start from ('standard', 'half_ppr' or 'ppr', any case).
+    :param overrides: Points per unit to change, e.g. pass_td=6.
+    :return: A new profile dict.
+    """
+    unknown = set(overrides) - set(STANDARD)
+    if unknown:
+        raise ValueError(f"Unknown scoring keys: {', '.join(sorted(unknown))}")
+    return {**get_scoring_profile(base), **overrides}
+
+
+def profile_name(name):
+    """
+    Normalizes a profile name as users write it ('PPR', 'half-ppr') to its SCORING_PROFILES key.
+
+    :raises ValueError: If no profile has that name.
+    """
+    normalized = name.lower().replace('-', '_')
+    if normalized not in SCORING_PROFILES:
+        raise ValueError(f"Unknown scoring profile: {name}")
+    return normalized
+
+
+def get_scoring_profile(profile):
+    """
+    Resolves a profile name or dict to a profile dict.
+
+    :param profile: A profile name from SCORING_PROFILES, a profile dict, or None.
+    :return: The profile dict, or None when no profile was requested.
+    """
+    if profile is None or isinstance(profile, dict):
+        return profile
+    return SCORING_PROFILES[profile_name(profile)]
+
+
+def profile_key(profile):
+    """
+    Returns a hashable key identifying a profile's scoring values, or None for the API default.
+    """
+    profile = get_scoring_profile(profile)
+    if profile is None:
+        return None
+    return tuple(sorted(profile.items()))
+
+
+def stat_value(stat_line, section, stat):
+    """
+    Reads one numeric stat from a projection or game stat line, treating missing values as 0.
+    """
+    source = stat_line.get(section) if section else stat_line
+    if not source:
+        return 0.0
+    try:
+        return float(source.get(stat) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def fantasy_points(stat_line, profile):
+    """
+    Scores a single stat line (one game, or one season projection) with a scoring profile.
+
+    :param stat_line: A game dict from getNFLGamesForPlayer or a player's projection dict.
+    :param profile: A profile name or dict.
+    :return: The fantasy points as a float.
+    """
+    profile = get_scoring_profile(profile)
+    points = 0.0
+    for key, section, stat in STAT_FIELDS:
+        weight = profile.get(key, 0)
+        if weight:
+            points += weight * stat_value(stat_line, section, stat)
+    return points
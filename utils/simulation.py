@@ -0,0 +1,124 @@
+import os
+from statistics import NormalDist
+
+import numpy as np
+
+# Simulated games per player
+SIMULATION_DRAWS = int(os.getenv("SIMULATION_DRAWS", "100000"))
+# Spread relative to the score assumed for players with fewer than two games to fit one from
+DEFAULT_RELATIVE_SPREAD = float(os.getenv("SIMULATION_DEFAULT_SPREAD", "0.5"))
+# Floors keeping the fitted distribution valid for players projected at or near zero points
+MIN_SCORE = 0.1
+MIN_SPREAD = 1.0
+PERCENTILES = (10, 25, 50, 75, 90)
+# Standard normal quantile of each percentile
+PERCENTILE_Z = np.array([NormalDist().inv_cdf(rank / 100) for rank in PERCENTILES])
+
+
+def fit_outcomes(scores):
+    """
+    Fits each player's weekly points to a lognormal distribution: non-negative and skewed towards
+    big games, like fantasy scores. Its mean is the compare_players score and its standard deviation
+    the game-to-game spread of the player's recent game log.
+
+    :param scores: List of score dicts from score_player.
+    :return: Tuple of (mu, sigma) arrays of the underlying normal distributions.
+    """
+    means = np.array([max(score['score'], MIN_SCORE) for score in scores], dtype=np.float64)
+    spreads = np.array([score['spread'] if score.get('spread') is not None else DEFAULT_RELATIVE_SPREAD * mean
+                        for score, mean in zip(scores, means)], dtype=np.float64)
+    spreads = np.maximum(spreads, MIN_SPREAD)
+    sigma_squared = np.log1p((spreads / means) ** 2)
+    return np.log(means) - sigma_squared / 2, np.sqrt(sigma_squared)
+
+
+def simulate(scores, draws=SIMULATION_DRAWS, seed=None):
+    """
+    Draws simulated weekly points for every player at once.
+
+    :param scores: List of score dicts from score_player.
+    :param draws: Simulated games per player (default: SIMULATION_DRAWS).
+    :param seed: Seed of the random generator, for reproducible results (optional).
+    :return: Array of shape (players, draws) of simulated points.
+    """
+    mu, sigma = fit_outcomes(scores)
+    normal = np.random.default_rng(seed).standard_normal((len(scores), draws), dtype=np.float32)
+    normal *= sigma[:, np.newaxis].astype(np.float32)
+    normal += mu[:, np.newaxis].astype(np.float32)
+    return np.exp(normal, out=normal)
+
+
+def win_probability(samples_a, samples_b):
+    """
+    Share of simulated games in which the first player outscores the second.
+    """
+    return float(np.count_nonzero(samples_a > samples_b)) / len(samples_a)
+
+
+def outcome_percentiles(scores):
+    """
+    Returns the PERCENTILES of each player's fitted distribution.
+
+    They are read from the fitted lognormal directly rather than by sorting the draws, which would
+    cost more than drawing them and only add sampling noise.
+
+    :param scores: List of score dicts from score_player.
+    :return: List of dicts mapping 'p10', 'p25', ... to points, one per player.
+    """
+    mu, sigma = fit_outcomes(scores)
+    percentiles = np.exp(mu[:, np.newaxis] + sigma[:, np.newaxis] * PERCENTILE_Z)
+    return [{f'p{rank}': round(float(value), 2) for rank, value in zip(PERCENTILES, values)}
+            for values in percentiles]
+
+
+def simulate_comparison(comparison, draws=SIMULATION_DRAWS, seed=None):
+    """
+    Simulates both players of a compare_players result.
+
+    :param comparison: A successful compare_players result.
+    :param draws: Simulated games per player (default: SIMULATION_DRAWS).
+    :param seed: Seed of the random generator, for reproducible results (optional).
+    :return: A dict with the probability that each player outscores the other under 'win_probability'
+             and each player's percentiles under 'player_a' and 'player_b'.
+    """
+    scores = [comparison['player_a'], comparison['player_b']]
+    samples = simulate(scores, draws, seed)
+    player_a, player_b = outcome_percentiles(scores)
+    return {
+        'draws': draws,
+        'win_probability': {
+            'player_a': round(win_probability(samples[0], samples[1]), 4),
+            'player_b': round(win_probability(samples[1], samples[0]), 4),
+        },
+        'player_a': {'percentiles': player_a},
+        'player_b': {'percentiles': player_b},
+    }
+
+
+def simulate_roster(scores, draws=SIMULATION_DRAWS, seed=None):
+    """
+    Simulates a whole roster in one batch of draws.
+
+    Win probabilities are only computed between players at the same position, the start/sit
+    decisions a lineup is made of, instead of between every pair of the roster.
+
+    :param scores: List of score dicts from score_player.
+    :param draws: Simulated games per player (default: SIMULATION_DRAWS).
+    :param seed: Seed of the random generator, for reproducible results (optional).
+    :return: A dict mapping each player ID under 'players' to its 'percentiles' and 'win_probability'
+             over each other player at its position.
+    """
+    if not scores:
+        return {'draws': draws, 'players': {}}
+    samples = simulate(scores, draws, seed)
+    players = {}
+    for row, (score, percentiles) in enumerate(zip(scores, outcome_percentiles(scores))):
+        players[score['id']] = {
+            'percentiles': percentiles,
+            'win_probability': {
+                other['id']: round(win_probability(samples[row], samples[column]), 4)
+                for column, other in enumerate(scores)
+                if column != row and other['position'] == score['position']
+            },
+        }
+    return {'draws': draws, 'players': players}
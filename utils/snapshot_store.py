@@ -0,0 +1,347 @@
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_STORE_PATH = os.path.join('data', 'snapshot.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    player_id TEXT PRIMARY KEY,
+    name TEXT,
+    name_lower TEXT,
+    pos TEXT,
+    team TEXT,
+    projection TEXT,
+    headshot TEXT,
+    headshot_team TEXT
+);
+CREATE INDEX IF NOT EXISTS players_name ON players (name_lower);
+CREATE INDEX IF NOT EXISTS players_team ON players (team);
+
+CREATE TABLE IF NOT EXISTS teams (
+    team_abv TEXT PRIMARY KEY,
+    sort_order INTEGER,
+    data TEXT
+);
+
+CREATE TABLE IF NOT EXISTS weekly_games (
+    season INTEGER,
+    week INTEGER,
+    game_id TEXT,
+    home TEXT,
+    away TEXT,
+    data TEXT,
+    PRIMARY KEY (season, week, game_id)
+);
+CREATE INDEX IF NOT EXISTS weekly_games_home ON weekly_games (season, week, home);
+CREATE INDEX IF NOT EXISTS weekly_games_away ON weekly_games (season, week, away);
+
+CREATE TABLE IF NOT EXISTS player_games (
+    player_id TEXT,
+    game_id TEXT,
+    data TEXT,
+    PRIMARY KEY (player_id, game_id)
+);
+
+CREATE TABLE IF NOT EXISTS game_results (
+    game_id TEXT PRIMARY KEY,
+    season INTEGER,
+    week INTEGER,
+    home TEXT,
+    away TEXT,
+    home_pts INTEGER,
+    away_pts INTEGER
+);
+CREATE INDEX IF NOT EXISTS game_results_week ON game_results (season, week);
+
+CREATE TABLE IF NOT EXISTS player_aggregates (
+    player_id TEXT PRIMARY KEY,
+    last_game_id TEXT,
+    data TEXT
+);
+
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SnapshotStore:
+    """
+    Local SQLite copy of the Tank01 data the app uses, with indexed lookups by player, team and week.
+
+    It answers the same questions as the fetchers in utils.api_calls and returns responses in the
+    same shape, so the rest of the app cannot tell the difference.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self):
+        # One connection per thread, the fan-out pool reads the store concurrently
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    # Ingest
+
+    def save_projections(self, projections):
+        rows = [(player_id, projection.get('longName'), (projection.get('longName') or '').lower(),
+                 projection.get('pos'), projection.get('team'), json.dumps(projection))
+                for player_id, projection in projections.items()]
+        with self._connection() as connection:
+            connection.executemany(
+                'INSERT INTO players (player_id, name, name_lower, pos, team, projection) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (player_id) DO UPDATE SET name = excluded.name, name_lower = excluded.name_lower, '
+                'pos = excluded.pos, team = excluded.team, projection = excluded.projection', rows)
+        self._touch('projections')
+
+    def save_headshot(self, player_id, headshot, team):
+        with self._connection() as connection:
+            connection.execute('UPDATE players SET headshot = ?, headshot_team = ? WHERE player_id = ?',
+                               (headshot, team, player_id))
+
+    def save_teams(self, teams):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM teams')
+            connection.executemany('INSERT INTO teams (team_abv, sort_order, data) VALUES (?, ?, ?)',
+                                   [(team['teamAbv'], order, json.dumps(team)) for order, team in enumerate(teams)])
+        self._touch('teams')
+
+    def save_weekly_games(self, season, week, games):
+        with self._connection() as connection:
+            connection.execute('DELETE FROM weekly_games WHERE season = ? AND week = ?', (int(season), int(week)))
+            connection.executemany(
+                'INSERT INTO weekly_games (season, week, game_id, home, away, data) VALUES (?, ?, ?, ?, ?, ?)',
+                [(int(season), int(week), game.get('gameID'), game.get('home'), game.get('away'), json.dumps(game))
+                 for game in games])
+        self._touch('weekly_games')
+
+    def save_player_games(self, player_id, games):
+        with self._connection() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO player_games (player_id, game_id, data) VALUES (?, ?, ?)',
+                [(player_id, game_id, json.dumps(game)) for game_id, game in games.items()])
+        self._touch('player_games')
+
+    def save_game_lines(self, lines):
+        """
+        Adds per-player stat lines for games, e.g. from box scores.
+
+        :param lines: Iterable of (player ID, game ID, stat line dict).
+        """
+        with self._connection() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO player_games (player_id, game_id, data) VALUES (?, ?, ?)',
+                [(player_id, game_id, json.dumps(line)) for player_id, game_id, line in lines])
+        self._touch('player_games')
+
+    def save_game_results(self, season, week, results):
+        """
+        Adds the final scores of completed games, e.g. from box scores.
+
+        :param results: Iterable of (game ID, home team, away team, home points, away points).
+        """
+        with self._connection() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO game_results (game_id, season, week, home, away, home_pts, away_pts) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(game_id, int(season), int(week), home, away, int(home_pts), int(away_pts))
+                 for game_id, home, away, home_pts, away_pts in results])
+        self._touch('game_results')
+
+    def save_aggregates(self, aggregates):
+        """
+        :param aggregates: Dict mapping a player ID to (last game ID, aggregate dict).
+        """
+        with self._connection() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO player_aggregates (player_id, last_game_id, data) VALUES (?, ?, ?)',
+                [(player_id, last_game_id, json.dumps(data))
+                 for player_id, (last_game_id, data) in aggregates.items()])
+        self._touch('player_games')
+
+    def aggregates(self, player_ids):
+        """
+        Returns a dict mapping each of the player IDs that has running totals to its aggregate dict.
+        """
+        player_ids = list(player_ids)
+        aggregates = {}
+        # Chunked to stay under SQLite's limit on bound parameters
+        for start in range(0, len(player_ids), 500):
+            chunk = player_ids[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = self._connection().execute(
+                f'SELECT player_id, data FROM player_aggregates WHERE player_id IN ({placeholders})',
+                chunk).fetchall()
+            aggregates.update((player_id, json.loads(data)) for player_id, data in rows)
+        return aggregates
+
+    def game_results(self, season):
+        """
+        Returns the season's stored final scores in week order, as dicts with 'week', 'gameID', 'home',
+        'away', 'homePts' and 'awayPts'.
+        """
+        rows = self._connection().execute(
+            'SELECT week, game_id, home, away, home_pts, away_pts FROM game_results WHERE season = ? '
+            'ORDER BY week, game_id', (int(season),)).fetchall()
+        return [{'week': week, 'gameID': game_id, 'home': home, 'away': away, 'homePts': home_pts,
+                 'awayPts': away_pts} for week, game_id, home, away, home_pts, away_pts in rows]
+
+    def game_lines(self, game_ids):
+        """
+        Returns every stored player stat line of the games, as (player ID, game ID, stat line dict).
+        """
+        game_ids = list(game_ids)
+        lines = []
+        # Chunked to stay under SQLite's limit on bound parameters
+        for start in range(0, len(game_ids), 500):
+            chunk = game_ids[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            rows = self._connection().execute(
+                f'SELECT player_id, game_id, data FROM player_games WHERE game_id IN ({placeholders})',
+                chunk).fetchall()
+            lines.extend((player_id, game_id, json.loads(data)) for player_id, game_id, data in rows)
+        return lines
+
+    def mark_week_ingested(self, season, week):
+        with self._connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)',
+                               (f'box_scores:{int(season)}:{int(week)}', str(time.time())))
+
+    def week_ingested(self, season, week):
+        row = self._connection().execute('SELECT 1 FROM metadata WHERE key = ?',
+                                         (f'box_scores:{int(season)}:{int(week)}',)).fetchone()
+        return row is not None
+
+    def version(self, dataset):
+        """
+        Returns when a dataset was last written (as a string timestamp), or None if it never was.
+        """
+        row = self._connection().execute('SELECT value FROM metadata WHERE key = ?',
+                                         (f'updated_at:{dataset}',)).fetchone()
+        return row[0] if row else None
+
+    def _touch(self, dataset):
+        with self._connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)',
+                               (f'updated_at:{dataset}', str(time.time())))
+
+    # Lookups, shaped like the Tank01 responses
+
+    def projections(self, week='season', player_id=None, team_id=None):
+        if player_id:
+            row = self._connection().execute('SELECT projection FROM players WHERE player_id = ?',
+                                             (player_id,)).fetchone()
+            return {'body': json.loads(row[0])} if row else None
+        if str(week) != 'season':
+            return None
+        if team_id:
+            rows = self._connection().execute('SELECT player_id, projection FROM players WHERE team = ?',
+                                              (team_id,)).fetchall()
+        else:
+            rows = self._connection().execute('SELECT player_id, projection FROM players').fetchall()
+        if not rows:
+            return None
+        return {'body': {'playerProjections': {player_id: json.loads(projection) for player_id, projection in rows},
+                         'teamDefenseProjections': {}}}
+
+    def teams(self):
+        rows = self._connection().execute('SELECT data FROM teams ORDER BY sort_order').fetchall()
+        if not rows:
+            return None
+        return {'body': [json.loads(data) for data, in rows]}
+
+    def player_games(self, player_id, number_of_games=None):
+        # Game IDs start with the game date, so sorting them descending puts the latest game first
+        query = 'SELECT game_id, data FROM player_games WHERE player_id = ? ORDER BY game_id DESC'
+        params = [player_id]
+        if number_of_games:
+            query += ' LIMIT ?'
+            params.append(int(number_of_games))
+        rows = self._connection().execute(query, params).fetchall()
+        if not rows:
+            return None
+        return {'body': {game_id: json.loads(data) for game_id, data in rows}}
+
+    def weekly_games(self, week, season=None):
+        if season is None:
+            season = self._connection().execute('SELECT MAX(season) FROM weekly_games').fetchone()[0]
+        rows = self._connection().execute(
+            'SELECT data FROM weekly_games WHERE season = ? AND week = ? ORDER BY game_id',
+            (int(season or 0), int(week))).fetchall()
+        if not rows:
+            return None
+        return {'body': [json.loads(data) for data, in rows]}
+
+    def headshot(self, player_name):
+        row = self._connection().execute('SELECT headshot, headshot_team, team FROM players WHERE name_lower = ?',
+                                         ((player_name or '').lower(),)).fetchone()
+        if not row or not row[0]:
+            print(f"No headshot found for player: {player_name}")
+            return None
+        return row[0], row[1] or row[2]
+
+    def serve(self, endpoint, params):
+        """
+        Answers a fetcher call from the store.
+
+        :param endpoint: The Tank01 endpoint name.
+        :param params: The fetcher's bound arguments.
+        :return: The response in the fetcher's return shape, or None if the store does not have it.
+        """
+        if endpoint == 'getNFLProjections':
+            return self.projections(params.get('week'), params.get('player_id'), params.get('team_id'))
+        if endpoint == 'getNFLTeams':
+            return self.teams()
+        if endpoint == 'getNFLGamesForPlayer':
+            return self.player_games(params['player_id'], params.get('number_of_games'))
+        if endpoint == 'getNFLGamesForWeek':
+            return self.weekly_games(params['week'], params.get('season'))
+        if endpoint == 'getNFLPlayerInfo':
+            return self.headshot(params['player_name'])
+        return None
+
+
+def _open_offline_store():
+    path = os.getenv("API_OFFLINE_STORE")
+    return SnapshotStore(path) if path else None
+
+
+# When API_OFFLINE_STORE points at an ingested store, every fetcher is served from it
+offline_store = _open_offline_store()
+
+
+def served_offline(endpoint):
+    """
+    Decorator that answers a fetcher from the offline store instead of the network when it is enabled.
+
+    :param endpoint: The Tank01 endpoint name passed to SnapshotStore.serve.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if offline_store is None:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return offline_store.serve(endpoint, bound.arguments)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,106 @@
+from utils.api_calls import get_nfl_teams
+from utils.cache import derived_from
+
+# Lightest getNFLTeams request that still carries standings, logos and the defensive stats
+# used by utils.matchups. Everything that needs team data shares this one cached response.
+TEAM_FETCH_PARAMS = {
+    'rosters': False,
+    'schedules': False,
+    'top_performers': False,
+    'team_stats': True,
+    'team_stats_season': 2024,
+}
+
+
+def fetch_teams():
+    """
+    Fetches the league's teams with TEAM_FETCH_PARAMS.
+    """
+    return get_nfl_teams(**TEAM_FETCH_PARAMS)
+
+
+def team_multiplier(wins, losses, streak_result, streak_length):
+    """
+    Computes the team momentum multiplier applied to a player's projection.
+
+    :param wins: Team wins.
+    :param losses: Team losses.
+    :param streak_result: 'W' or 'L' for the current streak.
+    :param streak_length: Length of the current streak.
+    :return: The multiplier (1.0 means no adjustment).
+    """
+    if streak_result == "W":
+        streak_factor = streak_length
+    else:
+        streak_factor = 1
+    if losses == 0 or wins == 0:
+        multiplier = wins * .01
+    elif losses == 1:
+        multiplier = (wins - 1) * .01
+    else:
+        multiplier = (wins/losses) * .01
+    return multiplier * (streak_factor / 2) + 1
+
+
+class Team:
+    __slots__ = ('abv', 'logo', 'wins', 'losses', 'ties', 'streak_result', 'streak_length', 'multiplier')
+
+    def __init__(self, team):
+        """
+        :param team: One team dict from a getNFLTeams response.
+        """
+        self.abv = team['teamAbv']
+        self.logo = team.get('nflComLogo1')
+        self.wins = int(team.get('wins'))
+        self.losses = int(team.get('loss'))
+        self.ties = int(team.get('tie') or 0)
+        streak = team.get('currentStreak') or {}
+        self.streak_result = streak.get('result')
+        self.streak_length = int(streak.get('length') or 0)
+        self.multiplier = team_multiplier(self.wins, self.losses, self.streak_result, self.streak_length)
+
+    @property
+    def record(self):
+        return f"{self.wins}-{self.losses}-{self.ties}" if self.ties else f"{self.wins}-{self.losses}"
+
+
+class TeamRepository:
+    """
+    Teams keyed by abbreviation with logos, records and precomputed momentum multipliers.
+    """
+
+    def __init__(self, teams):
+        """
+        :param teams: The 'body' list from a getNFLTeams response.
+        """
+        self.teams = {}
+        for team in teams:
+            self.teams[team['teamAbv'].upper()] = Team(team)
+
+    def get(self, team_id):
+        if not team_id:
+            return None
+        return self.teams.get(team_id.upper())
+
+    def multiplier(self, team_id):
+        team = self.get(team_id)
+        return team.multiplier if team else None
+
+    def logo(self, team_id):
+        team = self.get(team_id)
+        return team.logo if team else None
+
+
+_repository = derived_from(fetch_teams, TeamRepository)
+
+
+def get_team_repository(data=None):
+    """
+    Returns the shared TeamRepository.
+
+    It is rebuilt only when the cached getNFLTeams response is refreshed, so the response
+    cache TTL for getNFLTeams is the refresh schedule.
+
+    :param data: An already fetched response from fetch_teams() (optional).
+    """
+    return _repository(data=data)